@@ -0,0 +1,9 @@
+from dotenv import load_dotenv
+from os import getenv
+
+# The .env file is read once, by whichever module imports this first; every
+# module reads its settings through `getenv` from here so none of them can
+# run before it has been loaded.
+load_dotenv()
+
+__all__ = ["getenv"]
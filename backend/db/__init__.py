@@ -1,4 +1 @@
-__all__ = ["db", "migrations"]
-
-from .db import create_connection
-from .db import database
+__all__ = ["db", "migrations", "session"]
@@ -0,0 +1,243 @@
+import aiomysql
+from aiomysql import SSCursor as SSCursor
+from aiomysql.connection import EOFPacketWrapper, FieldDescriptorPacket, OKPacketWrapper
+from asyncio import wait_for, TimeoutError as AsyncTimeoutError
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from struct import Struct, pack, unpack_from
+from typing import NamedTuple
+from mysql.connector.errors import Error, get_mysql_exception
+from mysql.connector.protocol import MySQLProtocol
+from pymysql.constants import COMMAND, FIELD_TYPE, FLAG
+from pymysql.err import MySQLError as PyMySQLError, ProgrammingError
+from .db import PoolTimeoutError
+from .statements import placeholders
+
+
+def translate_error(e: PyMySQLError) -> Error:
+    # Re-raise driver errors as mysql.connector errors so routes keep a single
+    # `except MYSQLError` branch whichever driver is configured.
+    if e.args and isinstance(e.args[0], int) and e.args[0]:
+        msg = e.args[1] if len(e.args) > 1 else str(e)
+        return get_mysql_exception(e.args[0], msg=msg)
+    return Error(msg=str(e))
+
+
+# Server-side prepared statements over aiomysql, which only speaks the text
+# protocol: COM_STMT_PREPARE/EXECUTE/CLOSE on the connection's own stream.
+# Parameters are encoded by mysql.connector's protocol module; result rows
+# come back in the binary format and are decoded below into the same Python
+# types aiomysql returns for text results.
+
+
+class PreparedStatement(NamedTuple):
+    statement_id: int
+    param_count: int
+
+
+async def prepare(conn, sql: str) -> PreparedStatement:
+    await conn._execute_command(COMMAND.COM_STMT_PREPARE, placeholders(sql))
+    data = (await conn._read_packet()).get_all_data()
+    statement_id, column_count, param_count = unpack_from("<IHH", data, 1)
+    # Parameter and column definitions, each followed by an EOF packet.
+    for count in (param_count, column_count):
+        if count:
+            for _ in range(count + 1):
+                await conn._read_packet()
+    return PreparedStatement(statement_id, param_count)
+
+
+async def close_statement(conn, statement: PreparedStatement):
+    # The server sends no reply to COM_STMT_CLOSE.
+    await conn._execute_command(
+        COMMAND.COM_STMT_CLOSE, pack("<I", statement.statement_id)
+    )
+
+
+_protocol = MySQLProtocol()
+
+
+async def execute_prepared(conn, statement: PreparedStatement, params):
+    """Run ``statement``; return its rows, or an OKPacketWrapper if it has none."""
+    if len(params) != statement.param_count:
+        raise ProgrammingError(
+            1210, "Incorrect number of arguments executing prepared statement"
+        )
+    await conn._execute_command(
+        COMMAND.COM_STMT_EXECUTE,
+        _protocol.make_stmt_execute(
+            statement.statement_id,
+            tuple(params),
+            (None,) * len(params),
+            charset=conn.encoding,
+        ),
+    )
+    packet = await conn._read_packet()
+    if packet.is_ok_packet():
+        ok = OKPacketWrapper(packet)
+        conn.server_status = ok.server_status
+        return ok
+
+    fields = [
+        await conn._read_packet(FieldDescriptorPacket)
+        for _ in range(packet.read_length_encoded_integer())
+    ]
+    await conn._read_packet()  # EOF after the column definitions
+    rows = []
+    while True:
+        packet = await conn._read_packet()
+        if packet.is_eof_packet():
+            conn.server_status = EOFPacketWrapper(packet).server_status
+            return rows
+        rows.append(decode_row(packet.get_all_data(), fields, conn.encoding))
+
+
+_integers = {
+    FIELD_TYPE.TINY: (Struct("<b"), Struct("<B")),
+    FIELD_TYPE.SHORT: (Struct("<h"), Struct("<H")),
+    FIELD_TYPE.YEAR: (Struct("<h"), Struct("<H")),
+    FIELD_TYPE.INT24: (Struct("<i"), Struct("<I")),
+    FIELD_TYPE.LONG: (Struct("<i"), Struct("<I")),
+    FIELD_TYPE.LONGLONG: (Struct("<q"), Struct("<Q")),
+    FIELD_TYPE.FLOAT: (Struct("<f"), Struct("<f")),
+    FIELD_TYPE.DOUBLE: (Struct("<d"), Struct("<d")),
+}
+_temporals = {FIELD_TYPE.DATE, FIELD_TYPE.DATETIME, FIELD_TYPE.TIMESTAMP}
+# By payload length: date only, with time, with microseconds.
+_temporal_formats = {4: "<HBB", 7: "<HBBBBB", 11: "<HBBBBBI"}
+_decimals = {FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL}
+
+
+def _read_length(data: bytes, pos: int):
+    first = data[pos]
+    if first < 0xFB:
+        return first, pos + 1
+    size = {0xFC: 2, 0xFD: 3, 0xFE: 8}[first]
+    return int.from_bytes(data[pos + 1 : pos + 1 + size], "little"), pos + 1 + size
+
+
+def decode_row(data: bytes, fields, encoding: str) -> tuple:
+    """Decode one binary protocol result row."""
+    # Header byte, then a NULL bitmap whose first two bits are reserved.
+    pos = 1 + (len(fields) + 9) // 8
+    row = []
+    for i, field in enumerate(fields):
+        bit = i + 2
+        if data[1 + bit // 8] & (1 << bit % 8):
+            row.append(None)
+            continue
+
+        kind = field.type_code
+        if kind in _integers:
+            signed, unsigned = _integers[kind]
+            number = unsigned if field.flags & FLAG.UNSIGNED else signed
+            row.append(number.unpack_from(data, pos)[0])
+            pos += number.size
+        elif kind in _temporals:
+            length = data[pos]
+            if not length:
+                row.append(None)  # zero date
+            else:
+                parts = unpack_from(_temporal_formats[length], data, pos + 1)
+                if kind == FIELD_TYPE.DATE:
+                    row.append(date(*parts[:3]))
+                else:
+                    row.append(datetime(*parts))
+            pos += 1 + length
+        elif kind == FIELD_TYPE.TIME:
+            length = data[pos]
+            value = timedelta()
+            if length:
+                negative, days, hours, minutes, seconds = unpack_from(
+                    "<BIBBB", data, pos + 1
+                )
+                micro = unpack_from("<I", data, pos + 9)[0] if length == 12 else 0
+                value = timedelta(days, seconds, micro, 0, minutes, hours)
+                value = -value if negative else value
+            row.append(value)
+            pos += 1 + length
+        else:
+            length, pos = _read_length(data, pos)
+            raw = data[pos : pos + length]
+            pos += length
+            if kind in _decimals:
+                row.append(Decimal(raw.decode()))
+            elif kind == FIELD_TYPE.JSON:
+                row.append(raw.decode(encoding))
+            elif field.charsetnr == 63 or kind == FIELD_TYPE.BIT:
+                row.append(bytes(raw))
+            else:
+                row.append(raw.decode(encoding))
+    return tuple(row)
+
+
+class AsyncConnectionPool:
+    """Bounded pool of non-blocking aiomysql connections.
+
+    The underlying aiomysql pool is created on first checkout, since it has to
+    be bound to the running event loop.
+    """
+
+    def __init__(self, pool_size=5, max_overflow=10, timeout=30.0, **connect_args):
+        self.maxsize = pool_size + max_overflow
+        self.timeout = timeout
+        self.connect_args = connect_args
+        self.connect_timeout = connect_args.get("connect_timeout", timeout)
+        self._pool = None
+
+    async def _get_pool(self):
+        if self._pool is None:
+            self._pool = await aiomysql.create_pool(
+                minsize=0,
+                maxsize=self.maxsize,
+                autocommit=False,
+                **self.connect_args,
+            )
+        return self._pool
+
+    async def checkout(self):
+        try:
+            pool = await self._get_pool()
+            # aiomysql's connect_timeout only covers the TCP connect, so when
+            # this checkout has to open a connection, bound the handshake too.
+            timeout = self.timeout
+            if not pool.freesize and pool.size < pool.maxsize:
+                timeout = min(timeout, self.connect_timeout)
+            conn = await wait_for(pool.acquire(), timeout)
+        except AsyncTimeoutError:
+            raise PoolTimeoutError(
+                msg=f"No database connection available after {timeout}s"
+            )
+        except PyMySQLError as e:
+            raise translate_error(e) from e
+
+        try:
+            await conn.ping(reconnect=True)
+        except PyMySQLError as e:
+            pool.release(conn)
+            raise translate_error(e) from e
+        return conn
+
+    async def checkin(self, conn):
+        # aiomysql closes connections released mid-transaction, so end it here.
+        try:
+            if not conn.closed:
+                await conn.rollback()
+        except PyMySQLError:
+            conn.close()
+        await self._pool.release(conn)
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = await self.checkout()
+        try:
+            yield conn
+        finally:
+            await self.checkin(conn)
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
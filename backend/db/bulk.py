@@ -0,0 +1,123 @@
+from weakref import WeakKeyDictionary
+from config import getenv as os_getenv
+from utils.logger import logger
+
+MAX_BULK_ROWS = int(os_getenv("MAX_BULK_ROWS", "5000"))
+BULK_CHUNK_SIZE = int(os_getenv("BULK_CHUNK_SIZE", "500"))
+
+
+# innodb_autoinc_lock_mode under which concurrent inserts may interleave
+# their auto-increment ids, so a statement's ids need not be consecutive.
+INTERLEAVED = 2
+
+# (@@auto_increment_increment, @@innodb_autoinc_lock_mode) of each
+# connection, read on its first bulk insert: shards set the increment (with
+# an offset) to give out distinct ids.
+_auto_increments = WeakKeyDictionary()
+
+
+async def auto_increment(db) -> tuple:
+    settings = _auto_increments.get(db.conn)
+    if settings is None:
+        row = await db.fetchone(
+            "SELECT @@auto_increment_increment, @@innodb_autoinc_lock_mode"
+        )
+        settings = _auto_increments[db.conn] = tuple(int(value) for value in row)
+        if settings[1] == INTERLEAVED:
+            logger.warning(
+                "innodb_autoinc_lock_mode=2: bulk inserts run one row per "
+                "statement; set it to 1 for multi-row inserts"
+            )
+    return settings
+
+
+async def insert_many(db, table: str, columns, rows, chunk_size=BULK_CHUNK_SIZE):
+    """Insert rows with one multi-row INSERT per chunk and return their ids.
+
+    Does not commit. Under innodb_autoinc_lock_mode 0 or 1, InnoDB reserves
+    a multi-row VALUES insert's ids up front, so each chunk's ids run from
+    the lastrowid it reports in steps of @@auto_increment_increment. Under
+    mode 2 they may interleave with other inserts' ids, so each row is
+    inserted on its own to learn its id.
+    """
+    placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    step, lock_mode = await auto_increment(db)
+    if lock_mode == INTERLEAVED:
+        chunk_size = 1
+    ids = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start : start + chunk_size]
+        result = await db.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+            + ", ".join([placeholders] * len(chunk)),
+            tuple(value for row in chunk for value in row),
+        )
+        ids.extend(range(result.lastrowid, result.lastrowid + len(chunk) * step, step))
+    return ids
+
+
+def in_clause(values) -> str:
+    return "(" + ", ".join(["%s"] * len(values)) + ")"
+
+
+def padded(ids) -> list:
+    """Pad ids to a power of two in length by repeating the last one.
+
+    Repeats do not change an IN list's matches, and a few list lengths keep
+    the number of distinct statements, and so of prepared ones, small.
+    """
+    return list(ids) + [ids[-1]] * ((1 << (len(ids) - 1).bit_length()) - len(ids))
+
+
+async def lock_rows(db, table: str, id_column: str, ids, user_id: int, columns="*"):
+    """SELECT ... FOR UPDATE the user's rows among ids, in chunks."""
+    rows = []
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        chunk = padded(ids[start : start + BULK_CHUNK_SIZE])
+        rows += await db.fetchall(
+            f"SELECT {columns} FROM {table} WHERE {id_column} IN {in_clause(chunk)} "
+            "AND user_id = %s FOR UPDATE",
+            tuple(chunk) + (user_id,),
+        )
+    return rows
+
+
+async def update_many(db, table: str, id_column: str, columns, changes, user_id: int):
+    """Apply {id: {column: value}} patches with set-based UPDATE ... CASE.
+
+    A batch costs one UPDATE per chunk rather than one per row. Every one of
+    ``columns`` is assigned, a row's NULL (or missing) value keeping the
+    column as it is, so the statement's shape depends only on chunk length.
+    """
+    ids = list(changes)
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        chunk = padded(ids[start : start + BULK_CHUNK_SIZE])
+        when = " ".join(["WHEN %s THEN %s"] * len(chunk))
+        set_clause = ", ".join(
+            f"{column} = COALESCE(CASE {id_column} {when} END, {column})"
+            for column in columns
+        )
+        params = [
+            value
+            for column in columns
+            for row_id in chunk
+            for value in (row_id, changes[row_id].get(column))
+        ]
+        await db.execute(
+            f"UPDATE {table} SET {set_clause} "
+            f"WHERE {id_column} IN {in_clause(chunk)} AND user_id = %s",
+            tuple(params) + tuple(chunk) + (user_id,),
+        )
+
+
+async def delete_many(db, table: str, id_column: str, ids, user_id: int) -> int:
+    deleted = 0
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        chunk = padded(ids[start : start + BULK_CHUNK_SIZE])
+        result = await db.execute(
+            f"DELETE FROM {table} WHERE {id_column} IN {in_clause(chunk)} "
+            "AND user_id = %s",
+            tuple(chunk) + (user_id,),
+        )
+        deleted += result.rowcount
+    return deleted
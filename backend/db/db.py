@@ -1,30 +1,154 @@
 import mysql.connector
 from mysql.connector import Error
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
+from threading import BoundedSemaphore
+from config import getenv
 
 host, user, password, database, port = (
-    os.getenv("HOST"),
-    os.getenv("USER"),
-    os.getenv("PASSWORD"),
-    os.getenv("DATABASE"),
-    os.getenv("DB_PORT"),
+    getenv("HOST"),
+    getenv("USER"),
+    getenv("PASSWORD"),
+    getenv("DATABASE"),
+    getenv("DB_PORT"),
+)
+
+# "async" runs queries on aiomysql; "sync" keeps the blocking mysql.connector
+# driver (offloaded to the threadpool) so the two can be benchmarked.
+driver = getenv("DB_DRIVER", "async")
+
+pool_size, max_overflow, pool_timeout = (
+    int(getenv("DB_POOL_SIZE", 5)),
+    int(getenv("DB_MAX_OVERFLOW", 10)),
+    float(getenv("DB_POOL_TIMEOUT", 30)),
 )
 
+# Read replicas, comma separated, each mysql://[user[:password]@]host[:port][/db].
+# Whatever a URL leaves out is taken from the primary's settings above.
+replica_urls = [
+    url.strip() for url in getenv("DB_REPLICAS", "").split(",") if url.strip()
+]
+# How reads are spread over replicas: "round_robin" or "least_connections".
+replica_balance = getenv("DB_REPLICA_BALANCE", "round_robin")
+# Reads stay on the primary for this long after a user's write so that they
+# see it; keep it above the replicas' usual replication lag.
+sticky_seconds = float(getenv("DB_STICKY_SECONDS", 5))
+# A replica that failed to hand out a connection is skipped for this long.
+replica_retry_seconds = float(getenv("DB_REPLICA_RETRY_SECONDS", 10))
+
+# Shards holding the users' rows, in the same URL format as DB_REPLICAS. When
+# set, the database above is the directory: users and user_shards live there.
+shard_urls = [url.strip() for url in getenv("DB_SHARDS", "").split(",") if url.strip()]
+# How long a process trusts its cached copy of a user's placement.
+shard_map_ttl = float(getenv("DB_SHARD_MAP_TTL", 5))
+
+# Upper bound on opening one connection, so an unreachable server fails
+# requests and the readiness probe quickly instead of hanging them.
+connect_timeout = int(getenv("DB_CONNECT_TIMEOUT", 3))
 
-def create_connection():
+
+def primary_settings() -> dict:
+    return dict(host=host, user=user, password=password, port=port, database=database)
+
+
+def create_connection(**settings):
+    settings = {**primary_settings(), **settings}
     try:
         connection = mysql.connector.connect(
-            host=host,
-            user=user,
-            password=password,
-            database=database,
-            port=port or 3306,
+            host=settings["host"],
+            user=settings["user"],
+            password=settings["password"],
+            database=settings["database"],
+            port=settings["port"] or 3306,
+            connection_timeout=connect_timeout,
         )
         if connection.is_connected():
             return connection
     except Error as e:
         print(f"Error: {e}")
         return None
+
+
+class PoolTimeoutError(Error):
+    pass
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections.
+
+    Up to ``pool_size`` connections are kept open between requests and up to
+    ``max_overflow`` extra ones are opened under load and closed again on
+    checkin. When every slot is taken, ``checkout`` waits ``timeout`` seconds
+    before giving up with ``PoolTimeoutError``.
+    """
+
+    def __init__(self, pool_size=5, max_overflow=10, timeout=30.0, **connect_args):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.connect_args = connect_args
+        self._idle = LifoQueue()
+        self._slots = BoundedSemaphore(pool_size + max_overflow)
+
+    def _connect(self):
+        return mysql.connector.connect(**self.connect_args)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def checkout(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeoutError(
+                msg=f"No database connection available after {self.timeout}s"
+            )
+
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except Empty:
+                    return self._connect()
+
+                # Health check: ping the server and transparently reconnect
+                # connections that were dropped while sitting idle.
+                try:
+                    conn.ping(reconnect=True, attempts=1, delay=0)
+                    return conn
+                except Error:
+                    self._discard(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def checkin(self, conn):
+        try:
+            # End any transaction the request left open so the next borrower
+            # does not inherit its locks or its read snapshot.
+            if conn.is_connected():
+                conn.rollback()
+                if self._idle.qsize() < self.pool_size:
+                    self._idle.put(conn)
+                    return
+            self._discard(conn)
+        except Error:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except Empty:
+                return
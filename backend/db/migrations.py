@@ -1,7 +1,311 @@
-from db import create_connection
+from db.db import create_connection
+from db.shards import database_settings
+
+# Applied versions are recorded in `schema_migrations`; each entry runs once,
+# in order. Append new migrations with the next version number and never
+# edit one that has already shipped.
+MIGRATIONS = [
+    (
+        1,
+        "create users table",
+        """-- sql
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INT AUTO_INCREMENT PRIMARY KEY,
+                username VARCHAR(50) UNIQUE NOT NULL,
+                email VARCHAR(100) UNIQUE NOT NULL,
+                password_hash VARCHAR(255) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            );
+        """,
+    ),
+    (
+        2,
+        "create income table",
+        """-- sql
+            CREATE TABLE IF NOT EXISTS income (
+                income_id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT NOT NULL,
+                amount DECIMAL(10, 2) NOT NULL,
+                description VARCHAR(255),
+                income_date DATE NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+            );
+        """,
+    ),
+    (
+        3,
+        "create expenses table",
+        """-- sql
+            CREATE TABLE IF NOT EXISTS expenses (
+                expense_id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT NOT NULL,
+                amount DECIMAL(10, 2) NOT NULL,
+                description VARCHAR(255),
+                expense_date DATE NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+            );
+        """,
+    ),
+    (
+        4,
+        "create transactions table",
+        """-- sql
+            CREATE TABLE IF NOT EXISTS transactions (
+                transaction_id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT NOT NULL,
+                amount DECIMAL(10, 2) NOT NULL,
+                description VARCHAR(255),
+                transaction_date DATE NOT NULL,
+                type ENUM('income', 'expense') NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+            );
+        """,
+    ),
+    (
+        5,
+        "create budgets table",
+        """-- sql
+            CREATE TABLE IF NOT EXISTS budgets (
+                budget_id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT NOT NULL,
+                amount DECIMAL(10, 2) NOT NULL,
+                start_date DATE NOT NULL,
+                end_date DATE NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+                CHECK (end_date > start_date)
+            );
+        """,
+    ),
+    (
+        6,
+        "create savings_goals table",
+        """-- sql
+            CREATE TABLE IF NOT EXISTS savings_goals (
+                goal_id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT NOT NULL,
+                name VARCHAR(100) NOT NULL,
+                target_amount DECIMAL(10, 2) NOT NULL,
+                current_amount DECIMAL(10, 2) DEFAULT 0.00,
+                target_date DATE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+            );
+        """,
+    ),
+    # Covering (user_id, date, ...) indexes. InnoDB appends the primary key to
+    # every secondary index, so per-user date-range scans, (date, id) ordering
+    # and SUM(amount) rollups are all answered from the index alone.
+    (
+        7,
+        "index income by user and date",
+        """-- sql
+            ALTER TABLE income
+                ADD INDEX idx_income_user_date (user_id, income_date, amount),
+                ALGORITHM=INPLACE, LOCK=NONE;
+        """,
+    ),
+    (
+        8,
+        "index expenses by user and date",
+        """-- sql
+            ALTER TABLE expenses
+                ADD INDEX idx_expenses_user_date (user_id, expense_date, amount),
+                ALGORITHM=INPLACE, LOCK=NONE;
+        """,
+    ),
+    (
+        9,
+        "index transactions by user, date and type",
+        """-- sql
+            ALTER TABLE transactions
+                ADD INDEX idx_transactions_user_date (
+                    user_id, transaction_date, type, amount
+                ),
+                ALGORITHM=INPLACE, LOCK=NONE;
+        """,
+    ),
+    (
+        10,
+        "index budgets by user and window",
+        """-- sql
+            ALTER TABLE budgets
+                ADD INDEX idx_budgets_user_window (user_id, start_date, end_date),
+                ALGORITHM=INPLACE, LOCK=NONE;
+        """,
+    ),
+    (
+        11,
+        "index savings goals by user and creation time",
+        """-- sql
+            ALTER TABLE savings_goals
+                ADD INDEX idx_savings_goals_user_created (user_id, created_at),
+                ALGORITHM=INPLACE, LOCK=NONE;
+        """,
+    ),
+    # Per-user monthly totals, maintained by the write routes (see db.rollups)
+    # so dashboards read one row per month instead of scanning the ledger.
+    (
+        12,
+        "create user_period_totals table",
+        """-- sql
+            CREATE TABLE IF NOT EXISTS user_period_totals (
+                user_id INT NOT NULL,
+                kind VARCHAR(32) NOT NULL,
+                period DATE NOT NULL,
+                total DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+                count INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, kind, period),
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+            );
+        """,
+    ),
+    # Per-user change counters behind the ETags of the list routes, bumped by
+    # every write in the same transaction (see db.versions).
+    (
+        13,
+        "create user_versions table",
+        """-- sql
+            CREATE TABLE IF NOT EXISTS user_versions (
+                user_id INT NOT NULL,
+                resource VARCHAR(32) NOT NULL,
+                version BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, resource),
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+            );
+        """,
+    ),
+    # updated_at on every synced table, and the per-user change sequence
+    # number (see db.versions.next_change) of the transaction that last wrote
+    # each row, so /sync can page through what changed after a client's token
+    # from the (user_id, change_seq) indexes alone. Rows written before this
+    # keep 0 and are only sent by full syncs. The updated_at migrations name
+    # no ALGORITHM: InnoDB may not add a column defaulting to
+    # CURRENT_TIMESTAMP in place, and rather than fail, MySQL then copies the
+    # table, blocking writes to it meanwhile; run them in a quiet window.
+    (
+        14,
+        "add updated_at and change_seq to income",
+        """-- sql
+            ALTER TABLE income
+                ADD COLUMN updated_at TIMESTAMP NOT NULL
+                    DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                ADD COLUMN change_seq BIGINT NOT NULL DEFAULT 0,
+                ADD INDEX idx_income_user_change (user_id, change_seq);
+        """,
+    ),
+    (
+        15,
+        "add updated_at and change_seq to expenses",
+        """-- sql
+            ALTER TABLE expenses
+                ADD COLUMN updated_at TIMESTAMP NOT NULL
+                    DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                ADD COLUMN change_seq BIGINT NOT NULL DEFAULT 0,
+                ADD INDEX idx_expenses_user_change (user_id, change_seq);
+        """,
+    ),
+    (
+        16,
+        "add updated_at and change_seq to transactions",
+        """-- sql
+            ALTER TABLE transactions
+                ADD COLUMN updated_at TIMESTAMP NOT NULL
+                    DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                ADD COLUMN change_seq BIGINT NOT NULL DEFAULT 0,
+                ADD INDEX idx_transactions_user_change (user_id, change_seq);
+        """,
+    ),
+    (
+        17,
+        "add updated_at and change_seq to budgets",
+        """-- sql
+            ALTER TABLE budgets
+                ADD COLUMN updated_at TIMESTAMP NOT NULL
+                    DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                ADD COLUMN change_seq BIGINT NOT NULL DEFAULT 0,
+                ADD INDEX idx_budgets_user_change (user_id, change_seq);
+        """,
+    ),
+    (
+        18,
+        "add change_seq to savings goals",
+        """-- sql
+            ALTER TABLE savings_goals
+                ADD COLUMN change_seq BIGINT NOT NULL DEFAULT 0,
+                ADD INDEX idx_savings_goals_user_change (user_id, change_seq),
+                ALGORITHM=INPLACE, LOCK=NONE;
+        """,
+    ),
+    (
+        19,
+        "create deleted_rows table",
+        """-- sql
+            CREATE TABLE IF NOT EXISTS deleted_rows (
+                user_id INT NOT NULL,
+                resource VARCHAR(32) NOT NULL,
+                row_id INT NOT NULL,
+                deleted_at TIMESTAMP NOT NULL,
+                change_seq BIGINT NOT NULL,
+                PRIMARY KEY (user_id, resource, row_id),
+                INDEX idx_deleted_rows_user_change (user_id, resource, change_seq),
+                INDEX idx_deleted_rows_deleted (deleted_at),
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+            );
+        """,
+    ),
+    # FULLTEXT indexes behind /search. The first FULLTEXT index on a table
+    # adds InnoDB's hidden FTS_DOC_ID column, which rebuilds the table and
+    # blocks writes for the duration, so run these in a quiet window. After
+    # one, InnoDB can no longer rebuild the table in place (ER_INNODB_FT_LIMIT),
+    # so later changes to these three tables need ALGORITHM=COPY, which locks
+    # them; this is why the indexes come after the columns added above.
+    (
+        20,
+        "full-text index income descriptions",
+        """-- sql
+            ALTER TABLE income ADD FULLTEXT INDEX ft_income_description (description);
+        """,
+    ),
+    (
+        21,
+        "full-text index expense descriptions",
+        """-- sql
+            ALTER TABLE expenses
+                ADD FULLTEXT INDEX ft_expenses_description (description);
+        """,
+    ),
+    (
+        22,
+        "full-text index transaction descriptions",
+        """-- sql
+            ALTER TABLE transactions
+                ADD FULLTEXT INDEX ft_transactions_description (description);
+        """,
+    ),
+    (
+        23,
+        "create user_shards table",
+        """-- sql
+            CREATE TABLE IF NOT EXISTS user_shards (
+                user_id INT PRIMARY KEY,
+                shard INT NOT NULL,
+                moving BOOLEAN NOT NULL DEFAULT FALSE,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+            );
+        """,
+    ),
+]
 
 
 def execute_migration(conn, sql):
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute(sql)
@@ -10,118 +314,77 @@ def execute_migration(conn, sql):
     except Exception as e:
         print(f"Error executing migration: {e}")
         conn.rollback()
+        raise
     finally:
         if cursor:
             cursor.close()
 
 
-def run_migrations():
-    conn = create_connection()
+def applied_versions(conn):
+    execute_migration(
+        conn,
+        """-- sql
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """,
+    )
+    cursor = conn.cursor()
+    cursor.execute("SELECT version FROM schema_migrations")
+    versions = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return versions
+
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def run_migrations() -> bool:
+    """Migrate the primary and every shard: they all share one schema."""
+    for settings in database_settings():
+        print(f"Migrating {settings['host']}/{settings['database']}")
+        if not migrate(settings):
+            return False
+    return True
+
+
+def migrate(settings) -> bool:
+    conn = create_connection(**settings)
     if not conn:
         print("Failed to create database connection")
-        return
+        return False
 
     try:
-        execute_migration(
-            conn,
-            """-- sql
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INT AUTO_INCREMENT PRIMARY KEY,
-                    username VARCHAR(50) UNIQUE NOT NULL,
-                    email VARCHAR(100) UNIQUE NOT NULL,
-                    password_hash VARCHAR(255) NOT NULL, 
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-                );
-            """,
-        )
-
-        execute_migration(
-            conn,
-            """-- sql
-                CREATE TABLE IF NOT EXISTS income (
-                    income_id INT AUTO_INCREMENT PRIMARY KEY,
-                    user_id INT NOT NULL,
-                    amount DECIMAL(10, 2) NOT NULL,
-                    description VARCHAR(255),
-                    income_date DATE NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
-                );
-            """,
-        )
-
-        execute_migration(
-            conn,
-            """-- sql
-                CREATE TABLE IF NOT EXISTS expenses (
-                    expense_id INT AUTO_INCREMENT PRIMARY KEY,
-                    user_id INT NOT NULL,
-                    amount DECIMAL(10, 2) NOT NULL,
-                    description VARCHAR(255),
-                    expense_date DATE NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
-                );
-            """,
-        )
-
-        execute_migration(
-            conn,
-            """-- sql
-                CREATE TABLE IF NOT EXISTS transactions (
-                    transaction_id INT AUTO_INCREMENT PRIMARY KEY,
-                    user_id INT NOT NULL,
-                    amount DECIMAL(10, 2) NOT NULL,
-                    description VARCHAR(255),
-                    transaction_date DATE NOT NULL,
-                    type ENUM('income', 'expense') NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
-                );
-            """,
-        )
-
-        execute_migration(
-            conn,
-            """-- sql
-                CREATE TABLE IF NOT EXISTS budgets (
-                    budget_id INT AUTO_INCREMENT PRIMARY KEY,
-                    user_id INT NOT NULL,
-                    amount DECIMAL(10, 2) NOT NULL,
-                    start_date DATE NOT NULL,
-                    end_date DATE NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
-                    CHECK (end_date > start_date)
-                );
-            """,
-        )
-
-        execute_migration(
-            conn,
-            """-- sql
-                CREATE TABLE IF NOT EXISTS savings_goals (
-                    goal_id INT AUTO_INCREMENT PRIMARY KEY,
-                    user_id INT NOT NULL,
-                    name VARCHAR(100) NOT NULL,
-                    target_amount DECIMAL(10, 2) NOT NULL,
-                    current_amount DECIMAL(10, 2) DEFAULT 0.00,
-                    target_date DATE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
-                );
-            """,
-        )
+        applied = applied_versions(conn)
+        for version, name, sql in MIGRATIONS:
+            if version in applied:
+                continue
+
+            print(f"Applying migration {version}: {name}")
+            execute_migration(conn, sql)
+
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name),
+            )
+            conn.commit()
+            cursor.close()
 
         print("All migrations completed successfully")
+        return True
 
     except Exception as e:
         print(f"Migration failed: {e}")
+        return False
     finally:
         if conn:
             conn.close()
 
 
-run_migrations()
+if __name__ == "__main__":
+    # Migrations only ever run through this command (python -m db.migrations),
+    # never as a side effect of starting the API.
+    raise SystemExit(0 if run_migrations() else 1)
@@ -0,0 +1,121 @@
+from itertools import count
+from math import ceil
+from time import monotonic
+from typing import Optional
+from urllib.parse import unquote, urlparse
+from utils.logger import logger
+
+BALANCERS = ("round_robin", "least_connections")
+
+
+def replica_settings(url: str, **defaults) -> dict:
+    """Connection settings of a replica URL, completed from ``defaults``."""
+    parsed = urlparse(url if "://" in url else f"mysql://{url}")
+    settings = dict(defaults)
+    if parsed.hostname:
+        settings["host"] = parsed.hostname
+    if parsed.port:
+        settings["port"] = parsed.port
+    if parsed.username:
+        settings["user"] = unquote(parsed.username)
+    if parsed.password:
+        settings["password"] = unquote(parsed.password)
+    if parsed.path.strip("/"):
+        settings["database"] = parsed.path.strip("/")
+    return settings
+
+
+class Replica:
+    def __init__(self, name: str, pool):
+        self.name = name
+        self.pool = pool
+        self.in_use = 0
+        self.checkouts = 0
+        self.failures = 0
+        self.down_until = 0.0
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "in_use": self.in_use,
+            "checkouts": self.checkouts,
+            "failures": self.failures,
+            "down": self.down_until > monotonic(),
+        }
+
+
+class ReplicaSet:
+    """Read replicas and the policy that spreads reads over them.
+
+    ``round_robin`` takes replicas in turn; ``least_connections`` takes the
+    one with the fewest connections checked out, in turn among ties. A
+    replica that failed is skipped for ``retry_after`` seconds; with none
+    left, `pick` returns None and reads go to the primary.
+    """
+
+    def __init__(self, replicas, balance="round_robin", retry_after=10.0):
+        if balance not in BALANCERS:
+            raise ValueError(f"DB_REPLICA_BALANCE must be one of {BALANCERS}")
+        self.replicas = list(replicas)
+        self.balance = balance
+        self.retry_after = retry_after
+        self._turn = count()
+
+    def pick(self) -> Optional[Replica]:
+        now = monotonic()
+        turn = next(self._turn) % len(self.replicas)
+        candidates = [
+            replica
+            for replica in self.replicas[turn:] + self.replicas[:turn]
+            if replica.down_until <= now
+        ]
+        if not candidates:
+            return None
+        if self.balance == "least_connections":
+            return min(candidates, key=lambda replica: replica.in_use)
+        return candidates[0]
+
+    def failed(self, replica: Replica, error: Exception):
+        replica.failures += 1
+        replica.down_until = monotonic() + self.retry_after
+        logger.warning(
+            f"Replica {replica.name} unavailable, reading from the primary "
+            f"for {self.retry_after}s: {error}"
+        )
+
+    def stats(self):
+        return [replica.stats() for replica in self.replicas]
+
+
+class RecentWrites:
+    """Users who wrote within the last ``window`` seconds.
+
+    Their reads stay on the primary, so they see their own writes however far
+    the replicas lag. Markers live in the response cache's backend, which
+    must be shared (Redis) so every worker sees them: `get_replicas` refuses
+    to start otherwise. If the backend cannot be reached, every user counts
+    as a recent writer.
+    """
+
+    def __init__(self, backend, window: float):
+        self.backend = backend
+        self.window = window
+
+    def _key(self, user_id: int) -> str:
+        return f"wrote:{user_id}"
+
+    async def mark(self, user_id: int):
+        if self.window <= 0:
+            return
+        try:
+            await self.backend.set(self._key(user_id), b"1", ceil(self.window))
+        except Exception as e:
+            logger.error(f"Failed to record write of user {user_id}: {e}")
+
+    async def contains(self, user_id: int) -> bool:
+        try:
+            (marker,) = await self.backend.get_many([self._key(user_id)])
+        except Exception as e:
+            logger.warning(f"Recent writes unavailable: {e}")
+            return True
+        return marker is not None
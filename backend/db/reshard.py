@@ -0,0 +1,206 @@
+from sys import argv
+from time import sleep
+from config import getenv
+from db.db import create_connection
+from db import db as sync_db
+from db.shards import (
+    ANCHOR_SQL,
+    USER_TABLES,
+    anchor_values,
+    home_shard,
+    shard_settings,
+)
+
+# Longest a write request may run: after a placement changes, the tool waits
+# for cached copies to expire (DB_SHARD_MAP_TTL) and then this long more.
+RESHARD_GRACE_SECONDS = float(getenv("RESHARD_GRACE_SECONDS", 30))
+PIN_CHUNK_SIZE = 500
+
+
+def wait_out_placements():
+    delay = sync_db.shard_map_ttl + RESHARD_GRACE_SECONDS
+    print(f"Waiting {delay:g}s for cached placements to expire")
+    sleep(delay)
+
+
+def placement(directory, user_id: int, count: int) -> int:
+    cursor = directory.cursor()
+    try:
+        cursor.execute("SELECT shard FROM user_shards WHERE user_id = %s", (user_id,))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    return row[0] if row else home_shard(user_id, count)
+
+
+def place(directory, user_id: int, shard: int, moving: bool):
+    cursor = directory.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO user_shards (user_id, shard, moving) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE shard = VALUES(shard), moving = VALUES(moving)",
+            (user_id, shard, moving),
+        )
+        directory.commit()
+    finally:
+        cursor.close()
+
+
+def copy_rows(source, target, user_id: int) -> dict:
+    """Copy the user's rows, ids included, in one target transaction."""
+    reader, writer = source.cursor(), target.cursor()
+    copied = {}
+    try:
+        source.start_transaction(consistent_snapshot=True, readonly=True)
+        writer.execute(ANCHOR_SQL, anchor_values(user_id))
+        for table in USER_TABLES:
+            reader.execute(f"SELECT * FROM {table} WHERE user_id = %s", (user_id,))
+            rows = reader.fetchall()
+            if rows:
+                columns = ", ".join(reader.column_names)
+                values = ", ".join(["%s"] * len(reader.column_names))
+                writer.executemany(
+                    f"INSERT INTO {table} ({columns}) VALUES ({values})", rows
+                )
+            writer.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE user_id = %s", (user_id,)
+            )
+            (count,) = writer.fetchone()
+            if count != len(rows):
+                raise RuntimeError(
+                    f"{table}: target holds {count} rows, expected {len(rows)}"
+                )
+            copied[table] = count
+        target.commit()
+        return copied
+    except Exception:
+        target.rollback()
+        raise
+    finally:
+        source.rollback()
+        reader.close()
+        writer.close()
+
+
+def delete_rows(conn, user_id: int):
+    cursor = conn.cursor()
+    try:
+        for table in reversed(USER_TABLES):
+            cursor.execute(f"DELETE FROM {table} WHERE user_id = %s", (user_id,))
+        # Only an anchor: a shard may share its database with the directory,
+        # whose users row is the real one.
+        cursor.execute(
+            "DELETE FROM users WHERE user_id = %s AND username = %s",
+            anchor_values(user_id)[:2],
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def move_user(user_id: int, target: int) -> bool:
+    """Move a user's rows to shard ``target`` while the API keeps serving.
+
+    The user is marked as moving, so writes get 503 while reads continue
+    from the source; once no process can still be writing there, the rows
+    are copied, the directory is pointed at the target, and the source copy
+    is deleted after readers of the old placement are done. Shards must give
+    out distinct auto-increment ids (auto_increment_offset/increment) for
+    the copied ids to be free on the target; a clash aborts the move.
+    """
+    shards = shard_settings()
+    if not 0 <= target < len(shards):
+        print(f"Shard {target} does not exist; DB_SHARDS lists {len(shards)}")
+        return False
+
+    directory = create_connection()
+    if not directory:
+        print("Failed to create database connection")
+        return False
+
+    source_conn = target_conn = None
+    try:
+        source = placement(directory, user_id, len(shards))
+        if source == target:
+            print(f"User {user_id} is already on shard {target}")
+            return True
+
+        place(directory, user_id, source, moving=True)
+        try:
+            wait_out_placements()
+            source_conn = create_connection(**shards[source])
+            target_conn = create_connection(**shards[target])
+            if not source_conn or not target_conn:
+                raise RuntimeError("Failed to connect to the shards")
+            copied = copy_rows(source_conn, target_conn, user_id)
+        except Exception:
+            place(directory, user_id, source, moving=False)
+            raise
+        print(f"Copied user {user_id} to shard {target}: {copied}")
+
+        place(directory, user_id, target, moving=False)
+        wait_out_placements()
+        delete_rows(source_conn, user_id)
+        print(f"Moved user {user_id} from shard {source} to shard {target}")
+        return True
+
+    except Exception as e:
+        print(f"Move failed: {e}")
+        return False
+    finally:
+        for conn in (source_conn, target_conn, directory):
+            if conn:
+                conn.close()
+
+
+def pin_users() -> bool:
+    """Record every user's current shard in the directory.
+
+    Run before changing the number of DB_SHARDS: it changes home shards, and
+    pinned users stay where their rows are until moved.
+    """
+    count = len(shard_settings())
+    directory = create_connection()
+    if not directory:
+        print("Failed to create database connection")
+        return False
+
+    cursor = directory.cursor()
+    try:
+        last_user_id = 0
+        while True:
+            cursor.execute(
+                "SELECT u.user_id FROM users u "
+                "LEFT JOIN user_shards s ON s.user_id = u.user_id "
+                "WHERE u.user_id > %s AND s.user_id IS NULL "
+                "ORDER BY u.user_id LIMIT %s",
+                (last_user_id, PIN_CHUNK_SIZE),
+            )
+            user_ids = [row[0] for row in cursor.fetchall()]
+            if not user_ids:
+                break
+
+            cursor.executemany(
+                "INSERT IGNORE INTO user_shards (user_id, shard) VALUES (%s, %s)",
+                [(user_id, home_shard(user_id, count)) for user_id in user_ids],
+            )
+            directory.commit()
+            last_user_id = user_ids[-1]
+            print(f"Pinned users up to {last_user_id}")
+
+        print("All users pinned")
+        return True
+    finally:
+        cursor.close()
+        directory.close()
+
+
+if __name__ == "__main__":
+    if argv[1:2] == ["move"] and len(argv) == 4:
+        raise SystemExit(0 if move_user(int(argv[2]), int(argv[3])) else 1)
+    if argv[1:] == ["pin"]:
+        raise SystemExit(0 if pin_users() else 1)
+    print("Usage: python -m db.reshard move <user_id> <shard> | pin")
@@ -0,0 +1,100 @@
+from asyncio import sleep
+from collections import Counter
+from functools import wraps
+from random import uniform
+from threading import Lock
+from typing import Optional
+from mysql.connector import Error as MYSQLError
+from config import getenv
+from utils.logger import logger
+
+DB_RETRY_ATTEMPTS = int(getenv("DB_RETRY_ATTEMPTS", 3))
+DB_RETRY_BASE_DELAY = float(getenv("DB_RETRY_BASE_DELAY", 0.05))
+DB_RETRY_MAX_DELAY = float(getenv("DB_RETRY_MAX_DELAY", 1.0))
+
+# Transient error kinds. CONNECTION means the connection is unusable and its
+# transaction is gone; DEADLOCK and LOCK_WAIT leave the connection usable.
+CONNECTION = "connection"
+DEADLOCK = "deadlock"
+LOCK_WAIT = "lock_wait"
+
+error_kinds = {
+    1053: CONNECTION,  # ER_SERVER_SHUTDOWN
+    2003: CONNECTION,  # CR_CONN_HOST_ERROR
+    2006: CONNECTION,  # CR_SERVER_GONE_ERROR
+    2013: CONNECTION,  # CR_SERVER_LOST
+    2055: CONNECTION,  # CR_SERVER_LOST_EXTENDED
+    4031: CONNECTION,  # ER_CLIENT_INTERACTION_TIMEOUT
+    1213: DEADLOCK,  # ER_LOCK_DEADLOCK
+    1205: LOCK_WAIT,  # ER_LOCK_WAIT_TIMEOUT
+}
+
+
+class RetryStats:
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = Lock()
+
+    def record(self, event: str, kind: str):
+        with self._lock:
+            self._counts[f"{event}.{kind}"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+retry_stats = RetryStats()
+
+
+def classify(e: Exception) -> Optional[str]:
+    """Return the transient error kind of ``e``, or None if it is permanent.
+
+    Pool timeouts are deliberately permanent: retrying them only adds load
+    to a pool that is already exhausted.
+    """
+    if not isinstance(e, MYSQLError):
+        return None
+    return error_kinds.get(e.errno)
+
+
+async def backoff(attempt: int):
+    # Full jitter, so clients that failed together do not retry together.
+    await sleep(uniform(0, min(DB_RETRY_MAX_DELAY, DB_RETRY_BASE_DELAY * 2**attempt)))
+
+
+def retry_transaction(handler):
+    """Re-run a handler whose transaction hit a transient MySQL error.
+
+    The handler's session (its ``db`` argument) is rolled back, or given a
+    new connection, before each attempt. Nothing is retried once the
+    handler has committed, or when a commit failed with its outcome unknown.
+    """
+
+    @wraps(handler)
+    async def wrapper(*args, **kwargs):
+        db = kwargs["db"]
+        attempt = 0
+        while True:
+            commits = db.commits
+            try:
+                return await handler(*args, **kwargs)
+            except MYSQLError as e:
+                kind = classify(e)
+                if (
+                    kind is None
+                    or db.commits != commits
+                    or (db.commit_pending and kind == CONNECTION)
+                ):
+                    raise
+                if attempt + 1 >= DB_RETRY_ATTEMPTS:
+                    retry_stats.record("gave_up", kind)
+                    raise
+
+                retry_stats.record("transaction_retries", kind)
+                logger.warning(f"Retrying transaction after {kind} error: {e}")
+                await db.recover(kind)
+                await backoff(attempt)
+                attempt += 1
+
+    return wrapper
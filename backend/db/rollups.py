@@ -0,0 +1,131 @@
+from datetime import date
+from sys import argv
+from db.db import create_connection
+from db.shards import data_settings
+
+# Rollup kinds match the sources reported by /reports/summary.
+INCOME = "income"
+EXPENSES = "expenses"
+REBUILD_CHUNK_SIZE = 500
+
+month_start = "DATE_SUB({col}, INTERVAL DAYOFMONTH({col}) - 1 DAY)"
+
+rebuild_sources = [
+    ("%s", INCOME, "income", "income_date"),
+    ("%s", EXPENSES, "expenses", "expense_date"),
+    ("CONCAT(%s, type)", "transactions.", "transactions", "transaction_date"),
+]
+
+
+def transactions_kind(transaction_type) -> str:
+    return f"transactions.{getattr(transaction_type, 'value', transaction_type)}"
+
+
+def period_of(day: date) -> date:
+    return day.replace(day=1)
+
+
+async def apply_rollup(db, kind: str, user_id: int, day: date, amount, sign=1):
+    """Add (sign=1) or remove (sign=-1) one ledger row from its monthly total.
+
+    Must run on the same session, before the commit, as the write it mirrors.
+    """
+    await db.execute(
+        """-- sql
+            INSERT INTO user_period_totals (user_id, kind, period, total, count)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                total = total + VALUES(total), count = count + VALUES(count)
+        """,
+        (user_id, kind, period_of(day), amount * sign, sign),
+    )
+
+
+async def apply_rollups(db, entries, removed=()):
+    """Batched apply_rollup for bulk writes: entries (added) and removed are
+    (kind, user_id, day, amount) tuples, netted per month and upserted in a
+    single statement."""
+    totals = {}
+    for sign, rows in ((1, entries), (-1, removed)):
+        for kind, user_id, day, amount in rows:
+            key = (user_id, kind, period_of(day))
+            total, count = totals.get(key, (0, 0))
+            totals[key] = (total + amount * sign, count + sign)
+
+    if not totals:
+        return
+
+    await db.execute(
+        "INSERT INTO user_period_totals (user_id, kind, period, total, count) VALUES "
+        + ", ".join(["(%s, %s, %s, %s, %s)"] * len(totals))
+        + " ON DUPLICATE KEY UPDATE"
+        " total = total + VALUES(total), count = count + VALUES(count)",
+        tuple(value for key, sums in totals.items() for value in key + sums),
+    )
+
+
+def rebuild_chunk(conn, first_user_id: int, last_user_id: int):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "DELETE FROM user_period_totals WHERE user_id BETWEEN %s AND %s",
+            (first_user_id, last_user_id),
+        )
+        for kind_expr, kind, table, date_column in rebuild_sources:
+            period = month_start.format(col=date_column)
+            cursor.execute(
+                f"INSERT INTO user_period_totals (user_id, kind, period, total, count) "
+                f"SELECT user_id, {kind_expr} AS kind, {period} AS period, "
+                f"SUM(amount), COUNT(*) FROM {table} "
+                f"WHERE user_id BETWEEN %s AND %s GROUP BY user_id, kind, period",
+                (kind, first_user_id, last_user_id),
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def rebuild_rollups(chunk_size=REBUILD_CHUNK_SIZE):
+    """Recompute user_period_totals from the base tables, chunk_size users per
+    transaction, so the backfill never holds locks on the whole ledger. Each
+    shard is rebuilt in turn, for the users anchored there."""
+    for settings in data_settings():
+        rebuild_database(settings, chunk_size)
+
+
+def rebuild_database(settings, chunk_size):
+    conn = create_connection(**settings)
+    if not conn:
+        print("Failed to create database connection")
+        return
+
+    try:
+        last_user_id = 0
+        while True:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT user_id FROM users WHERE user_id > %s ORDER BY user_id LIMIT %s",
+                (last_user_id, chunk_size),
+            )
+            user_ids = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+            if not user_ids:
+                break
+
+            rebuild_chunk(conn, user_ids[0], user_ids[-1])
+            last_user_id = user_ids[-1]
+            print(f"Rebuilt rollups for users up to {last_user_id}")
+
+        print("Rollup rebuild completed successfully")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    if argv[1:2] != ["rebuild"]:
+        print("Usage: python -m db.rollups rebuild [chunk_size]")
+    else:
+        rebuild_rollups(int(argv[2]) if len(argv) > 2 else REBUILD_CHUNK_SIZE)
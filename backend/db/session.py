@@ -0,0 +1,630 @@
+from abc import ABC, abstractmethod
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import datetime
+from typing import NamedTuple, Optional
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+from mysql.connector import Error as MYSQLError
+from pymysql.err import MySQLError as PyMySQLError
+from . import db as sync_db
+from .replicas import RecentWrites, Replica, ReplicaSet, replica_settings
+from .shards import (
+    ANCHOR_SQL,
+    ShardMap,
+    UserMovingError,
+    anchor_values,
+    shard_settings,
+    sharded,
+)
+from .statements import (
+    DB_STATEMENT_CACHE_SIZE,
+    placeholders,
+    statement_cache,
+    statement_stats,
+)
+from .retry import (
+    CONNECTION,
+    DB_RETRY_ATTEMPTS,
+    backoff,
+    classify,
+    retry_stats,
+)
+from utils.logger import logger
+from utils.response_cache import response_cache
+
+
+class ExecResult(NamedTuple):
+    rowcount: int
+    lastrowid: Optional[int]
+
+
+class Session(ABC):
+    """Driver-independent handle on one checked-out connection.
+
+    Routes only talk to the database through these coroutines, so the same
+    handlers run on the native asyncio driver and on the blocking
+    mysql.connector driver (offloaded to the threadpool) alike.
+
+    A read that fails with a transient error (see `db.retry.classify`) is
+    retried after a jittered backoff, on a fresh connection if the old one
+    broke, as long as it opened its transaction: nothing earlier is lost.
+    Failures later in a transaction are left to `db.retry.retry_transaction`.
+
+    SQL run more than once on a connection is turned into a server-side
+    prepared statement and cached with it (see `db.statements`), so hot
+    queries are parsed once and their parameters sent in binary.
+    """
+
+    def __init__(self, pool, conn, frozen=False):
+        self.pool = pool
+        self.conn = conn
+        # Set while the user's rows are being moved between shards.
+        self.frozen = frozen
+        # Statements run in the current transaction, committed transactions,
+        # and whether a commit was sent without its outcome being known.
+        self.statements = 0
+        self.commits = 0
+        self.commit_pending = False
+        self._now = None
+
+    @abstractmethod
+    async def _run(self, sql, params, fetch): ...
+
+    @abstractmethod
+    async def _commit(self): ...
+
+    @abstractmethod
+    async def _rollback(self): ...
+
+    @abstractmethod
+    async def _reconnect(self): ...
+
+    async def _read(self, sql, params, fetch):
+        attempt = 0
+        while True:
+            first = self.statements == 0
+            self.statements += 1
+            try:
+                return await self._run(sql, params, fetch)
+            except MYSQLError as e:
+                kind = classify(e)
+                if kind is None or not first:
+                    raise
+                if attempt + 1 >= DB_RETRY_ATTEMPTS:
+                    retry_stats.record("gave_up", kind)
+                    raise
+
+                retry_stats.record("statement_retries", kind)
+                logger.warning(f"Retrying query after {kind} error: {e}")
+                await self.recover(kind)
+                await backoff(attempt)
+                attempt += 1
+
+    async def fetchone(self, sql, params=()):
+        return await self._read(sql, params, "one")
+
+    async def fetchall(self, sql, params=()):
+        return await self._read(sql, params, "all")
+
+    async def now(self) -> datetime:
+        """The database clock, read once per transaction.
+
+        Written explicitly into created_at/updated_at and tombstones, so
+        responses can be built without reading rows back. The server's clock
+        is in the zone its TIMESTAMP columns are converted from, whatever the
+        app host's is, and every row of a transaction gets the same time.
+        """
+        if self._now is None:
+            (self._now,) = await self.fetchone("SELECT CURRENT_TIMESTAMP")
+        return self._now
+
+    async def execute(self, sql, params=()) -> ExecResult:
+        self.statements += 1
+        return await self._run(sql, params, None)
+
+    @abstractmethod
+    async def stream(self, sql, params=(), batch_size=1000):
+        """Yield the result set in lists of ``batch_size`` rows.
+
+        Rows are read through an unbuffered (server-side) cursor, so only one
+        batch is ever held in memory.
+        """
+        # An async generator, as the implementations are.
+        yield []
+
+    async def commit(self):
+        if self.frozen:
+            raise UserMovingError("Your data is being moved; try again shortly")
+        self.commit_pending = True
+        await self._commit()
+        self.commit_pending = False
+        self.commits += 1
+        self.statements = 0
+        self._now = None
+
+    async def rollback(self):
+        await self._rollback()
+        self.statements = 0
+        self._now = None
+
+    async def recover(self, kind: str):
+        """Make the session usable again after a transient error of ``kind``.
+
+        A broken connection is returned to the pool (which discards it) and
+        replaced; otherwise the failed transaction is rolled back.
+        """
+        if kind != CONNECTION:
+            try:
+                await self.rollback()
+            except MYSQLError as e:
+                if classify(e) != CONNECTION:
+                    raise
+                kind = CONNECTION
+        if kind == CONNECTION:
+            retry_stats.record("reconnects", kind)
+            await self._reconnect()
+        self.statements = 0
+        self.commit_pending = False
+        self._now = None
+
+
+def fetched(rows, fetch):
+    if fetch == "one":
+        return rows[0] if rows else None
+    return rows
+
+
+class SyncSession(Session):
+    def _statement(self, sql):
+        cache = statement_cache(self.conn, self.conn.connection_id)
+        statement = cache.get(sql)
+        if statement is None and cache.should_prepare(sql):
+            statement = self.conn.cmd_stmt_prepare(placeholders(sql).encode())
+            for evicted in cache.add(sql, statement):
+                self.conn.cmd_stmt_close(evicted["statement_id"])
+        return statement
+
+    def _execute_prepared(self, statement, params, fetch):
+        result = self.conn.cmd_stmt_execute(
+            statement["statement_id"],
+            data=params,
+            parameters=statement["parameters"],
+        )
+        if isinstance(result, dict):
+            return ExecResult(result["affected_rows"], result["insert_id"])
+        self.conn.unread_result = True
+        rows, _ = self.conn.get_rows(binary=True, columns=result[1])
+        return fetched(rows, fetch)
+
+    def _execute(self, sql, params, fetch):
+        statement = self._statement(sql) if DB_STATEMENT_CACHE_SIZE else None
+        if statement is not None:
+            statement_stats.record("executed")
+            return self._execute_prepared(statement, params, fetch)
+
+        statement_stats.record("text")
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            if fetch == "one":
+                return cursor.fetchone()
+            if fetch == "all":
+                return cursor.fetchall()
+            return ExecResult(cursor.rowcount, cursor.lastrowid)
+        finally:
+            cursor.close()
+
+    async def _run(self, sql, params, fetch):
+        return await run_in_threadpool(self._execute, sql, params, fetch)
+
+    async def stream(self, sql, params=(), batch_size=1000):
+        cursor = self.conn.cursor(buffered=False)
+        try:
+            await run_in_threadpool(cursor.execute, sql, params)
+            while True:
+                rows = await run_in_threadpool(cursor.fetchmany, batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            # Drain whatever a disconnected client left unread so the
+            # connection can go back to the pool.
+            await run_in_threadpool(self.conn.consume_results)
+            cursor.close()
+
+    async def _commit(self):
+        await run_in_threadpool(self.conn.commit)
+
+    async def _rollback(self):
+        await run_in_threadpool(self.conn.rollback)
+
+    async def _reconnect(self):
+        conn, self.conn = self.conn, None
+        await run_in_threadpool(self.pool.checkin, conn)
+        self.conn = await run_in_threadpool(self.pool.checkout)
+
+
+class AsyncSession(Session):
+    async def _statement(self, sql):
+        cache = statement_cache(self.conn, self.conn.thread_id())
+        statement = cache.get(sql)
+        if statement is None and cache.should_prepare(sql):
+            statement = await aio.prepare(self.conn, sql)
+            for evicted in cache.add(sql, statement):
+                await aio.close_statement(self.conn, evicted)
+        return statement
+
+    async def _run(self, sql, params, fetch):
+        try:
+            statement = await self._statement(sql) if DB_STATEMENT_CACHE_SIZE else None
+            if statement is not None:
+                statement_stats.record("executed")
+                result = await aio.execute_prepared(self.conn, statement, params)
+                if isinstance(result, list):
+                    return fetched(result, fetch)
+                return ExecResult(result.affected_rows, result.insert_id)
+
+            statement_stats.record("text")
+            async with self.conn.cursor() as cursor:
+                await cursor.execute(sql, params)
+                if fetch == "one":
+                    return await cursor.fetchone()
+                if fetch == "all":
+                    return list(await cursor.fetchall())
+                return ExecResult(cursor.rowcount, cursor.lastrowid)
+        except PyMySQLError as e:
+            raise aio.translate_error(e) from e
+
+    async def stream(self, sql, params=(), batch_size=1000):
+        try:
+            async with self.conn.cursor(aio.SSCursor) as cursor:
+                await cursor.execute(sql, params)
+                while True:
+                    rows = await cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield rows
+        except PyMySQLError as e:
+            raise aio.translate_error(e) from e
+
+    async def _commit(self):
+        try:
+            await self.conn.commit()
+        except PyMySQLError as e:
+            raise aio.translate_error(e) from e
+
+    async def _rollback(self):
+        try:
+            await self.conn.rollback()
+        except PyMySQLError as e:
+            raise aio.translate_error(e) from e
+
+    async def _reconnect(self):
+        conn, self.conn = self.conn, None
+        await self.pool.checkin(conn)
+        self.conn = await self.pool.checkout()
+
+
+if sync_db.driver == "async":
+    from . import aio
+
+_pool = None
+_replicas = None
+_shards = None
+
+
+def _build_pool(host, user, password, port, database):
+    connect_args = dict(host=host, user=user, password=password, port=int(port or 3306))
+    if sync_db.driver == "async":
+        return aio.AsyncConnectionPool(
+            pool_size=sync_db.pool_size,
+            max_overflow=sync_db.max_overflow,
+            timeout=sync_db.pool_timeout,
+            db=database,
+            connect_timeout=sync_db.connect_timeout,
+            **connect_args,
+        )
+    return sync_db.ConnectionPool(
+        pool_size=sync_db.pool_size,
+        max_overflow=sync_db.max_overflow,
+        timeout=sync_db.pool_timeout,
+        database=database,
+        connection_timeout=sync_db.connect_timeout,
+        # SyncSession prepares statements through the pure Python
+        # connection's cmd_stmt_* API (the C extension's differs), so this
+        # driver gives up C-speed row parsing for them: worth it while the
+        # server's parse time dominates. DB_STATEMENT_CACHE_SIZE=0 goes back
+        # to the C extension (if installed) with text queries. The async
+        # driver is unaffected.
+        use_pure=bool(DB_STATEMENT_CACHE_SIZE),
+        **connect_args,
+    )
+
+
+def get_pool():
+    """Build the configured connection pool once.
+
+    Building it opens no connection: they are opened on first checkout, each
+    bounded by DB_CONNECT_TIMEOUT, so startup never waits on the database.
+    """
+    global _pool
+    if _pool is None:
+        _pool = _build_pool(**sync_db.primary_settings())
+    return _pool
+
+
+def get_replicas() -> Optional[ReplicaSet]:
+    """Build the pools of the DB_REPLICAS once; None when there are none."""
+    global _replicas
+    if _replicas is None and sync_db.replica_urls:
+        if sync_db.sticky_seconds > 0 and not recent_writes.backend.shared:
+            # Markers kept per process would only send a user's reads to the
+            # primary on the worker that handled their write.
+            raise ValueError(
+                "DB_REPLICAS needs RESPONSE_CACHE_URL: every worker must see "
+                "which users wrote within DB_STICKY_SECONDS"
+            )
+        replicas = []
+        for url in sync_db.replica_urls:
+            settings = replica_settings(url, **sync_db.primary_settings())
+            replicas.append(
+                Replica(
+                    f"{settings['host']}:{settings['port'] or 3306}",
+                    _build_pool(**settings),
+                )
+            )
+        _replicas = ReplicaSet(
+            replicas, sync_db.replica_balance, sync_db.replica_retry_seconds
+        )
+    return _replicas
+
+
+def get_shard_pools() -> list:
+    """Build the pools of the DB_SHARDS once, indexed by shard number."""
+    global _shards
+    if _shards is None:
+        _shards = [_build_pool(**settings) for settings in shard_settings()]
+    return _shards
+
+
+async def _close(pool):
+    if sync_db.driver == "async":
+        await pool.close()
+    else:
+        await run_in_threadpool(pool.close)
+
+
+async def close_pool():
+    global _pool, _replicas, _shards
+    pool, _pool = _pool, None
+    replicas, _replicas = _replicas, None
+    shards, _shards = _shards, None
+    if pool is not None:
+        await _close(pool)
+    for replica in replicas.replicas if replicas else ():
+        await _close(replica.pool)
+    for shard in shards or ():
+        await _close(shard)
+
+
+async def _checkout(pool):
+    if sync_db.driver == "async":
+        return await pool.checkout()
+    return await run_in_threadpool(pool.checkout)
+
+
+async def _checkin(pool, conn):
+    if sync_db.driver == "async":
+        await pool.checkin(conn)
+    else:
+        await run_in_threadpool(pool.checkin, conn)
+
+
+@asynccontextmanager
+async def session_scope(
+    replica: bool = False, shard: Optional[int] = None, frozen: bool = False
+):
+    """Check a connection out for the length of the block.
+
+    With ``replica``, it comes from a read replica when one is configured
+    and available, and from the primary otherwise. With ``shard``, it comes
+    from that shard; ``frozen`` sessions refuse to commit.
+    """
+    pool = get_pool() if shard is None else get_shard_pools()[shard]
+    conn = None
+    replicas = get_replicas() if replica else None
+    chosen = replicas.pick() if replicas else None
+    if chosen:
+        # Counted from before the checkout so concurrent picks see it.
+        chosen.in_use += 1
+        try:
+            conn = await _checkout(chosen.pool)
+            pool = chosen.pool
+            chosen.checkouts += 1
+        except MYSQLError as e:
+            chosen.in_use -= 1
+            replicas.failed(chosen, e)
+            chosen = None
+    if conn is None:
+        conn = await _checkout(pool)
+
+    session_class = AsyncSession if sync_db.driver == "async" else SyncSession
+    session = session_class(pool, conn, frozen)
+    try:
+        yield session
+    finally:
+        if chosen:
+            chosen.in_use -= 1
+        # The session may swap in a new connection while recovering, and
+        # holds none if that failed, so check in whatever it holds.
+        if session.conn is not None:
+            await _checkin(pool, session.conn)
+
+
+async def get_session():
+    async with session_scope() as session:
+        yield session
+
+
+class LazySession:
+    """A `Session` that checks its connection out on the first query.
+
+    ``target`` is a coroutine function returning the `session_scope`
+    arguments, so that lookup is put off as well: a request answered
+    without a query (a response cache hit) costs no connection at all.
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self._session = None
+        self._stack = AsyncExitStack()
+
+    async def session(self) -> Session:
+        if self._session is None:
+            self._session = await self._stack.enter_async_context(
+                session_scope(**await self.target())
+            )
+        return self._session
+
+    @property
+    def commits(self) -> int:
+        return self._session.commits if self._session else 0
+
+    @property
+    def commit_pending(self) -> bool:
+        return bool(self._session and self._session.commit_pending)
+
+    async def fetchone(self, sql, params=()):
+        return await (await self.session()).fetchone(sql, params)
+
+    async def fetchall(self, sql, params=()):
+        return await (await self.session()).fetchall(sql, params)
+
+    async def now(self) -> datetime:
+        return await (await self.session()).now()
+
+    async def execute(self, sql, params=()) -> ExecResult:
+        return await (await self.session()).execute(sql, params)
+
+    async def stream(self, sql, params=(), batch_size=1000):
+        async for rows in (await self.session()).stream(sql, params, batch_size):
+            yield rows
+
+    async def commit(self):
+        await (await self.session()).commit()
+
+    async def rollback(self):
+        if self._session is not None:
+            await self._session.rollback()
+
+    async def recover(self, kind: str):
+        # Nothing to recover before the checkout: the next query retries it.
+        if self._session is not None:
+            await self._session.recover(kind)
+
+    async def close(self):
+        await self._stack.aclose()
+
+
+recent_writes = RecentWrites(response_cache.backend, sync_db.sticky_seconds)
+
+
+def replicas_configured() -> bool:
+    return bool(sync_db.replica_urls)
+
+
+async def reads_from_replica(user_id: int) -> bool:
+    return replicas_configured() and not await recent_writes.contains(user_id)
+
+
+async def _load_placement(user_id: int):
+    async with session_scope() as db:
+        return await db.fetchone(
+            "SELECT shard, moving FROM user_shards WHERE user_id = %s", (user_id,)
+        )
+
+
+shard_map = ShardMap(len(sync_db.shard_urls), sync_db.shard_map_ttl, _load_placement)
+
+# Users whose anchor row this process already made sure of on their shard.
+_anchored = set()
+
+
+async def read_target(user_id: int) -> dict:
+    """`session_scope` arguments for reading the user's rows: their shard
+    when sharded, else a replica unless they wrote within DB_STICKY_SECONDS
+    and so might not see it there yet."""
+    if sharded():
+        return {"shard": (await shard_map.placement(user_id)).shard}
+    return {"replica": await reads_from_replica(user_id)}
+
+
+async def write_target(user_id: int) -> dict:
+    """`session_scope` arguments for writing the user's rows: their shard,
+    frozen while db.reshard moves them."""
+    if not sharded():
+        return {}
+    placement = await shard_map.placement(user_id)
+    if user_id not in _anchored:
+        async with session_scope(shard=placement.shard) as db:
+            await db.execute(ANCHOR_SQL, anchor_values(user_id))
+            await db.commit()
+        if len(_anchored) >= shard_map.maxsize:
+            _anchored.clear()
+        _anchored.add(user_id)
+    return {"shard": placement.shard, "frozen": placement.moving}
+
+
+async def get_read_session(request: Request):
+    """`get_session` for read-only routes over the user's own rows."""
+    user = request.state.user
+    target = await read_target(user.user_id) if user else {}
+    async with session_scope(**target) as session:
+        yield session
+
+
+async def get_lazy_read_session(request: Request):
+    """`get_read_session` for routes that may not need the database."""
+    user = request.state.user
+
+    async def target():
+        return await read_target(user.user_id) if user else {}
+
+    session = LazySession(target)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_user_session(request: Request):
+    """`get_session` for routes writing the user's own rows, or reading them
+    with no lag allowed: the primary, or the user's shard."""
+    user = request.state.user
+    target = await write_target(user.user_id) if user else {}
+    async with session_scope(**target) as session:
+        yield session
+
+
+async def remove_user(user_id: int):
+    """Drop a deleted user's rows, after the directory commit.
+
+    Their user_shards row went with the directory's, so every shard is
+    cleared; on each, the anchor's foreign keys cascade to the rest.
+    Failures are only logged: without the directory row, nothing can reach
+    those rows any more.
+    """
+    if not sharded():
+        return
+    for shard in range(len(get_shard_pools())):
+        try:
+            async with session_scope(shard=shard) as db:
+                await db.execute(
+                    "DELETE FROM users WHERE user_id = %s AND username = %s",
+                    anchor_values(user_id)[:2],
+                )
+                await db.commit()
+        except MYSQLError as e:
+            logger.error(f"Failed to remove user {user_id} from shard {shard}: {e}")
+    shard_map.forget(user_id)
+    _anchored.discard(user_id)
@@ -0,0 +1,108 @@
+from math import ceil
+from time import monotonic
+from typing import NamedTuple
+from zlib import crc32
+from . import db as sync_db
+from .replicas import replica_settings
+
+# Tables holding a user's rows, parents first. Every one has a user_id column
+# referencing users, so a shard needs the user's row there too (an anchor).
+USER_TABLES = [
+    "income",
+    "expenses",
+    "transactions",
+    "budgets",
+    "savings_goals",
+    "user_period_totals",
+    "user_versions",
+    "deleted_rows",
+]
+
+# Shard copies of a users row only exist to satisfy the foreign keys: the
+# real username, email and password hash stay in the directory.
+ANCHOR_SQL = """-- sql
+    INSERT IGNORE INTO users (user_id, username, email, password_hash)
+    VALUES (%s, %s, %s, '')
+"""
+
+
+def anchor_values(user_id: int):
+    return (user_id, f"#{user_id}", f"{user_id}@shard.invalid")
+
+
+class UserMovingError(Exception):
+    """The user's rows are being moved to another shard: writes must wait."""
+
+    # Seconds until the move may be done with, as far as a process can tell.
+    retry_after = max(1, ceil(sync_db.shard_map_ttl))
+
+
+def sharded() -> bool:
+    return bool(sync_db.shard_urls)
+
+
+def shard_settings() -> list:
+    """Connection settings of each DB_SHARDS entry, in shard number order."""
+    primary = sync_db.primary_settings()
+    return [replica_settings(url, **primary) for url in sync_db.shard_urls]
+
+
+def data_settings() -> list:
+    """Settings of every database holding users' rows: the shards, or the
+    primary alone when there are none."""
+    return shard_settings() if sharded() else [sync_db.primary_settings()]
+
+
+def database_settings() -> list:
+    """The primary, then every shard that is not the primary itself."""
+    primary = sync_db.primary_settings()
+    return [primary] + [
+        settings for settings in shard_settings() if settings != primary
+    ]
+
+
+def home_shard(user_id: int, count: int) -> int:
+    # crc32 rather than hash(): it must agree across processes and restarts.
+    return crc32(user_id.to_bytes(8, "big")) % count
+
+
+class Placement(NamedTuple):
+    shard: int
+    moving: bool
+
+
+class ShardMap:
+    """Which shard holds each user's rows.
+
+    A user lives on their home shard (a hash of their id) unless the
+    directory's user_shards table says otherwise, which is how db.reshard
+    moves users and pins them before shards are added. Placements are cached
+    for ``ttl`` seconds; db.reshard waits that long between its steps, so no
+    process acts on a stale one. ``load(user_id)`` reads the directory row.
+    """
+
+    def __init__(self, count: int, ttl: float, load, maxsize=100_000):
+        self.count = count
+        self.ttl = ttl
+        self.load = load
+        self.maxsize = maxsize
+        self._cache = {}
+
+    async def placement(self, user_id: int) -> Placement:
+        now = monotonic()
+        cached = self._cache.get(user_id)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+
+        row = await self.load(user_id)
+        if row:
+            placement = Placement(row[0], bool(row[1]))
+        else:
+            placement = Placement(home_shard(user_id, self.count), False)
+        if len(self._cache) >= self.maxsize:
+            self._cache.clear()
+        self._cache[user_id] = (placement, now + self.ttl)
+        return placement
+
+    def forget(self, user_id: int):
+        self._cache.pop(user_id, None)
@@ -0,0 +1,89 @@
+from collections import Counter, OrderedDict
+from threading import Lock
+from weakref import WeakKeyDictionary
+from config import getenv
+
+# Prepared statements kept open per connection; 0 sends every query as text.
+DB_STATEMENT_CACHE_SIZE = int(getenv("DB_STATEMENT_CACHE_SIZE", 128))
+# Executions of the same SQL on a connection before it gets prepared, so
+# one-off shapes do not pay the extra round trip of preparing them.
+DB_PREPARE_THRESHOLD = int(getenv("DB_PREPARE_THRESHOLD", 2))
+
+
+class StatementStats:
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = Lock()
+
+    def record(self, event: str, count=1):
+        with self._lock:
+            self._counts[event] += count
+
+    def stats(self):
+        with self._lock:
+            return {
+                event: self._counts[event]
+                for event in ("prepared", "closed", "executed", "text")
+            }
+
+
+statement_stats = StatementStats()
+
+
+class StatementCache:
+    """Server-side prepared statements of one connection, keyed by SQL text.
+
+    Statements are prepared on their ``threshold``-th use and the least
+    recently used one is closed once more than ``maxsize`` are open. The
+    cache remembers the server's id for the connection: a connection that
+    reconnected lost its statements along with its old session.
+    """
+
+    def __init__(self, connection_id, maxsize=128, threshold=2):
+        self.connection_id = connection_id
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.statements = OrderedDict()
+        self.uses = OrderedDict()
+
+    def get(self, sql):
+        statement = self.statements.get(sql)
+        if statement is not None:
+            self.statements.move_to_end(sql)
+        return statement
+
+    def should_prepare(self, sql) -> bool:
+        uses = self.uses.pop(sql, 0) + 1
+        if uses >= self.threshold:
+            return True
+        self.uses[sql] = uses
+        while len(self.uses) > self.maxsize:
+            self.uses.popitem(last=False)
+        return False
+
+    def add(self, sql, statement) -> list:
+        """Cache ``statement`` and return those evicted, for closing."""
+        self.statements[sql] = statement
+        evicted = []
+        while len(self.statements) > self.maxsize:
+            evicted.append(self.statements.popitem(last=False)[1])
+        statement_stats.record("prepared")
+        statement_stats.record("closed", len(evicted))
+        return evicted
+
+
+_caches = WeakKeyDictionary()
+
+
+def statement_cache(conn, connection_id) -> StatementCache:
+    cache = _caches.get(conn)
+    if cache is None or cache.connection_id != connection_id:
+        cache = _caches[conn] = StatementCache(
+            connection_id, DB_STATEMENT_CACHE_SIZE, DB_PREPARE_THRESHOLD
+        )
+    return cache
+
+
+def placeholders(sql: str) -> str:
+    # Our SQL never contains a literal "%s", so every one is a parameter.
+    return sql.replace("%s", "?")
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from config import getenv as os_getenv
+from sys import argv
+from db.db import create_connection
+from db.shards import data_settings
+
+# Clients whose last sync is older than this get a full resync instead of a
+# delta, which is what lets `prune_tombstones` forget older deletions.
+TOMBSTONE_RETENTION_DAYS = int(os_getenv("TOMBSTONE_RETENTION_DAYS", "90"))
+
+
+async def add_tombstones(
+    db, resource: str, rows, deleted_at: datetime, change_seq: int = 0
+):
+    """Record deleted (user_id, row_id) pairs of ``resource`` for /sync.
+
+    Must run on the same session, before the commit, as the delete itself,
+    with the change sequence number the delete took (see db.versions).
+    """
+    rows = list(rows)
+    if not rows:
+        return
+
+    await db.execute(
+        "INSERT INTO deleted_rows (user_id, resource, row_id, deleted_at, change_seq) "
+        "VALUES "
+        + ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+        + " ON DUPLICATE KEY UPDATE"
+        " deleted_at = VALUES(deleted_at), change_seq = VALUES(change_seq)",
+        tuple(
+            value
+            for user_id, row_id in rows
+            for value in (user_id, resource, row_id, deleted_at, change_seq)
+        ),
+    )
+
+
+def retention_horizon(now: datetime) -> datetime:
+    return now - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+
+
+def prune_tombstones():
+    for settings in data_settings():
+        prune_database(settings)
+
+
+def prune_database(settings):
+    conn = create_connection(**settings)
+    if not conn:
+        print("Failed to create database connection")
+        return
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "DELETE FROM deleted_rows"
+            " WHERE deleted_at < CURRENT_TIMESTAMP - INTERVAL %s DAY",
+            # A day of slack past the horizon /sync accepts tokens from:
+            # deletions are stamped a little before their transaction commits.
+            (TOMBSTONE_RETENTION_DAYS + 1,),
+        )
+        conn.commit()
+        print(f"Pruned {cursor.rowcount} tombstones")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    if argv[1:2] != ["prune"]:
+        print("Usage: python -m db.tombstones prune")
+    else:
+        prune_tombstones()
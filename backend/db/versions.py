@@ -0,0 +1,46 @@
+async def bump_versions(db, resource: str, user_ids):
+    """Advance the change version of ``resource`` for each of ``user_ids``.
+
+    Must run on the same session, before the commit, as the write it records,
+    so a version is never visible without the rows it describes.
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+
+    await db.execute(
+        "INSERT INTO user_versions (user_id, resource, version) VALUES "
+        + ", ".join(["(%s, %s, 1)"] * len(user_ids))
+        + " ON DUPLICATE KEY UPDATE version = version + 1",
+        tuple(value for user_id in user_ids for value in (user_id, resource)),
+    )
+
+
+async def current_version(db, resource: str, user_id: int) -> int:
+    row = await db.fetchone(
+        "SELECT version FROM user_versions WHERE user_id = %s AND resource = %s",
+        (user_id, resource),
+    )
+    return row[0] if row else 0
+
+
+# user_versions row holding each user's change sequence, next to the
+# per-table versions; no table has this name.
+CHANGES = "_changes"
+
+
+async def next_change(db, user_id: int) -> int:
+    """Take the user's next change sequence number for the current transaction.
+
+    The counter row stays locked until the commit, so a user's numbers are
+    handed out, and become visible, in commit order: once a number can be
+    read, every smaller one is committed too. This is what lets /sync resume
+    from the last number a client saw without missing slow transactions.
+    """
+    result = await db.execute(
+        "INSERT INTO user_versions (user_id, resource, version) "
+        "VALUES (%s, %s, LAST_INSERT_ID(1)) "
+        "ON DUPLICATE KEY UPDATE version = LAST_INSERT_ID(version + 1)",
+        (user_id, CHANGES),
+    )
+    return result.lastrowid
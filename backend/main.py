@@ -1,9 +1,10 @@
 from fastapi import FastAPI
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from utils.logger import logger
-from dotenv import load_dotenv
 from middleware.jwt_auth import JWTAuthMiddleware
-from os import getenv as os_getenv
+from config import getenv as os_getenv
+from db.session import get_pool, get_replicas, close_pool
+from utils.response_cache import response_cache
 
 from routes.user import router as user_router
 from routes.income import router as income_router
@@ -12,10 +13,26 @@ from routes.expense import router as expense_router
 from routes.transaction import router as transaction_router
 from routes.budget import router as budget_router
 from routes.savings_goals import router as savings_goals_router
+from routes.reports import router as reports_router
+from routes.metrics import router as metrics_router
+from routes.search import router as search_router
+from routes.sync import router as sync_router
+from routes.health import router as health_router
 
-load_dotenv()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup does no I/O: the pools are built here, so bad settings stop it,
+    # but connect on first use, and migrations are applied separately with
+    # `python -m db.migrations`.
+    get_pool()
+    get_replicas()
+    yield
+    await close_pool()
+    await response_cache.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 print([os_getenv("FRONTEND_URL")])
 
@@ -36,6 +53,11 @@ app.include_router(expense_router)
 app.include_router(transaction_router)
 app.include_router(budget_router)
 app.include_router(savings_goals_router)
+app.include_router(reports_router)
+app.include_router(metrics_router)
+app.include_router(search_router)
+app.include_router(sync_router)
+app.include_router(health_router)
 
 
 @app.get("/")
@@ -1,16 +1,11 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 from jwt import decode as jwt_decode, InvalidTokenError
-from fastapi.responses import JSONResponse
-from fastapi import status
 from schemas import BaseErrorResponse, User
-from dotenv import load_dotenv
-from os import getenv as os_getenv
-from db.db import create_connection
-
-load_dotenv()
-
-conn = create_connection()
+from config import getenv as os_getenv
+from db.session import session_scope
+from utils.user_cache import user_cache
+from utils.responses import ModelResponse
 
 JWT_SECRET_KEY = os_getenv("JWT_SECRET_KEY")
 
@@ -24,45 +19,68 @@ column_names = [
 ]
 
 
-class JWTAuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        if "authorization" in request.headers:
-            auth_header = request.headers["authorization"]
-            if auth_header.startswith("Bearer "):
-                token = auth_header.split("Bearer ")[1]
+class JWTAuthMiddleware:
+    """Resolve the bearer token's user into ``scope["state"]["user"]``.
+
+    Written as plain ASGI rather than ``BaseHTTPMiddleware`` so requests are
+    passed straight through to the app, with no extra task or memory stream
+    in between, and streaming responses are left untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        state["user"] = None
+
+        auth_header = Headers(scope=scope).get("authorization")
+        if auth_header and auth_header.startswith("Bearer "):
+            token = auth_header.split("Bearer ")[1]
+
+            try:
+                payload = jwt_decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
+                state["user"] = await resolve_user(payload["username"])
+            except InvalidTokenError:
+                response = ModelResponse(
+                    status_code=401,
+                    content=BaseErrorResponse(
+                        success=False,
+                        errorType="InvalidToken",
+                        error="Invalid or expired JWT token.",
+                    ),
+                )
+                await response(scope, receive, send)
+                return
+            except Exception as e:
+                response = ModelResponse(
+                    status_code=500,
+                    content=BaseErrorResponse(
+                        success=False,
+                        errorType="TokenDecodeError",
+                        error=f"Failed to decode token: {str(e)}",
+                    ),
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
 
-                try:
-                    payload = jwt_decode(token, JWT_SECRET_KEY, algorithms=["HS256"])
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        """-- sql
-                            select * from users where username = %s
-                        """,
-                        tuple([payload["username"]]),
-                    )
-                    row = cursor.fetchone()
-                    user = User(**dict(zip(column_names, row)))
-                    request.state.user = user
-                except InvalidTokenError:
-                    return JSONResponse(
-                        status_code=401,
-                        content=BaseErrorResponse(
-                            success=False,
-                            errorType="InvalidToken",
-                            error="Invalid or expired JWT token.",
-                        ).model_dump(),
-                    )
-                except Exception as e:
-                    return JSONResponse(
-                        status_code=500,
-                        content=BaseErrorResponse(
-                            success=False,
-                            errorType="TokenDecodeError",
-                            error=f"Failed to decode token: {str(e)}",
-                        ).model_dump(),
-                    )
-        else:
-            request.state.user = None
 
-        response = await call_next(request)
-        return response
+async def resolve_user(username: str) -> User:
+    user = user_cache.get(username)
+    if user is None:
+        async with session_scope() as db:
+            row = await db.fetchone(
+                """-- sql
+                    select * from users where username = %s
+                """,
+                tuple([username]),
+            )
+        user = User(**dict(zip(column_names, row)))
+        user_cache.put(user)
+    return user
@@ -1,379 +1,140 @@
-from fastapi import APIRouter, Request, status
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from fastapi import Request, Depends
 from mysql.connector import Error as MYSQLError
+from typing import Optional
+from bisect import bisect_left, bisect_right
+from datetime import date
+from decimal import Decimal
+from itertools import accumulate
 from schemas import (
     Budget,
+    BudgetUtilization,
     CreateBudget,
     UpdateBudget,
     User,
     BaseSuccessResponse,
     BaseErrorResponse,
 )
-from db.db import create_connection
+from db.session import Session, get_read_session
+from routes.crud import Resource, crud_router
+from utils.responses import (
+    ModelResponse,
+    auth_error_response,
+    error_response,
+    not_found_response,
+)
 from utils.logger import logger
-from json import loads as json_loads
-
-router = APIRouter(prefix="/budget")
-conn = create_connection()
-
-
-class BudgetSuccessResponse(BaseSuccessResponse):
-    results: Budget
-
-
-class BudgetsSuccessResponse(BaseSuccessResponse):
-    results: list[Budget]
-
 
-column_names = [
-    "budget_id",
-    "user_id",
-    "amount",
-    "start_date",
-    "end_date",
-    "created_at",
-]
 
+class BudgetUtilizationSuccessResponse(BaseSuccessResponse):
+    results: list[BudgetUtilization]
 
-@router.get(
-    "/get_budget/{budget_id}",
-    responses={
-        200: {"model": BudgetSuccessResponse},
-        404: {"model": BaseErrorResponse},
-        500: {"model": BaseErrorResponse},
-    },
-)
-def get_budget(budget_id: int, request: Request):
-    try:
-        if conn:
-            vuser: User = request.state.user
-            if not vuser:
-                return auth_error_response()
 
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM budgets WHERE budget_id = %s AND user_id = %s",
-                (budget_id, vuser.user_id),
-            )
-            row = cursor.fetchone()
-            cursor.close()
+def check_window(budget) -> Optional[str]:
+    if budget.end_date <= budget.start_date:
+        return "end_date must be after start_date"
 
-            if not row:
-                return not_found_response(f"Budget ID {budget_id} not found")
 
-            return JSONResponse(
-                status_code=200,
-                content=jsonable_encoder(
-                    BudgetSuccessResponse(
-                        success=True,
-                        message="Budget fetched successfully",
-                        results=Budget(**dict(zip(column_names, row))),
-                    ).model_dump()
-                ),
-            )
-    except MYSQLError as e:
-        logger.error(f"MySQL error: {e}")
-        return error_response(e)
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return error_response(e)
-
-
-@router.get(
-    "/get_budgets",
-    responses={
-        200: {"model": BudgetsSuccessResponse},
-        404: {"model": BaseErrorResponse},
-        500: {"model": BaseErrorResponse},
-    },
+resource = Resource(
+    table="budgets",
+    pk="budget_id",
+    model=Budget,
+    create_schema=CreateBudget,
+    update_schema=UpdateBudget,
+    singular="budget",
+    plural="budgets",
+    label="Budget",
+    sort_column="start_date",
+    timestamp_columns=("created_at", "updated_at"),
+    updated_column="updated_at",
+    check=check_window,
 )
-def get_budgets(request: Request, budget_ids: str):
-    try:
-        if conn:
-            vuser: User = request.state.user
-            if not vuser:
-                return auth_error_response()
-
-            budget_ids = json_loads(budget_ids)
-            placeholders = ", ".join(["%s"] * len(budget_ids))
-            cursor = conn.cursor()
-            cursor.execute(
-                f"SELECT * FROM budgets WHERE budget_id IN ({placeholders}) AND user_id = %s",
-                tuple(budget_ids) + (vuser.user_id,),
-            )
-            rows = cursor.fetchall()
-            cursor.close()
 
-            if not rows:
-                return not_found_response(f"No budgets found for IDs {budget_ids}")
-
-            budgets = [Budget(**dict(zip(column_names, row))) for row in rows]
-            return JSONResponse(
-                status_code=200,
-                content=jsonable_encoder(
-                    BudgetsSuccessResponse(
-                        success=True,
-                        message="Budgets fetched",
-                        results=budgets,
-                    ).model_dump()
-                ),
-            )
-    except MYSQLError as e:
-        logger.error(f"MySQL error: {e}")
-        return error_response(e)
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return error_response(e)
+router = crud_router(resource, "/budget")
+
+
+def utilization(budget: Budget, days, cumulative, today: date):
+    # cumulative[i] is the total spent before days[i], so the spend inside
+    # any window is the difference of two binary-searched prefix sums.
+    first = bisect_left(days, budget.start_date)
+    last = bisect_right(days, budget.end_date)
+    spent = Decimal(cumulative[last] - cumulative[first])
+
+    window_days = (budget.end_date - budget.start_date).days + 1
+    days_elapsed = min(max((today - budget.start_date).days + 1, 0), window_days)
+
+    return BudgetUtilization.model_construct(
+        **budget.__dict__,
+        spent=spent,
+        remaining=budget.amount - spent,
+        percent_used=(
+            (spent * 100 / budget.amount).quantize(Decimal("0.01"))
+            if budget.amount
+            else None
+        ),
+        days_elapsed=days_elapsed,
+        burn_rate=(
+            (spent / days_elapsed).quantize(Decimal("0.01"))
+            if days_elapsed
+            else Decimal("0.00")
+        ),
+    )
 
 
 @router.get(
-    "/get_all_budgets",
+    "/utilization",
     responses={
-        200: {"model": BudgetsSuccessResponse},
+        200: {"model": BudgetUtilizationSuccessResponse},
         404: {"model": BaseErrorResponse},
         500: {"model": BaseErrorResponse},
     },
 )
-def get_user_budgets(request: Request):
+async def get_budget_utilization(
+    request: Request, db: Session = Depends(get_read_session)
+):
     try:
-        if conn:
-            vuser: User = request.state.user
-            if not vuser:
-                return auth_error_response()
-
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM budgets WHERE user_id = %s",
-                (vuser.user_id,),
-            )
-            rows = cursor.fetchall()
-            cursor.close()
-
-            if not rows:
-                return not_found_response(
-                    f"No budgets found for user ID {vuser.user_id}"
-                )
-
-            budgets = [Budget(**dict(zip(column_names, row))) for row in rows]
-            return JSONResponse(
-                status_code=200,
-                content=jsonable_encoder(
-                    BudgetsSuccessResponse(
-                        success=True,
-                        message="User budgets fetched successfully",
-                        results=budgets,
-                    ).model_dump()
-                ),
-            )
+        vuser: User = request.state.user
+        if not vuser:
+            return auth_error_response()
+
+        rows = await db.fetchall(
+            f"{resource.select_all_sql} ORDER BY start_date, budget_id",
+            (vuser.user_id,),
+        )
+
+        if not rows:
+            return not_found_response(f"No budgets found for user ID {vuser.user_id}")
+
+        budgets = [resource.to_model(row) for row in rows]
+
+        # One pass over daily expense totals covering every budget window,
+        # instead of one SUM per budget over overlapping ranges.
+        daily = await db.fetchall(
+            "SELECT expense_date, SUM(amount) FROM expenses "
+            "WHERE user_id = %s AND expense_date BETWEEN %s AND %s "
+            "GROUP BY expense_date ORDER BY expense_date",
+            (
+                vuser.user_id,
+                min(budget.start_date for budget in budgets),
+                max(budget.end_date for budget in budgets),
+            ),
+        )
+        days = [day for day, _ in daily]
+        cumulative = list(accumulate((total for _, total in daily), initial=0))
+
+        today = date.today()
+        results = [utilization(budget, days, cumulative, today) for budget in budgets]
+
+        return ModelResponse(
+            status_code=200,
+            content=BudgetUtilizationSuccessResponse.model_construct(
+                success=True,
+                message="Budget utilization computed successfully",
+                results=results,
+            ),
+        )
     except MYSQLError as e:
         logger.error(f"MySQL error: {e}")
         return error_response(e)
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         return error_response(e)
-
-
-@router.post(
-    "/post_budget",
-    responses={
-        200: {"model": BudgetSuccessResponse},
-        422: {"model": BaseErrorResponse},
-        500: {"model": BaseErrorResponse},
-    },
-)
-def create_budget(budget_data: CreateBudget, request: Request):
-    try:
-        if conn:
-            vuser: User = request.state.user
-            if not vuser:
-                return auth_error_response()
-
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO budgets (user_id, amount, start_date, end_date) VALUES (%s, %s, %s, %s)",
-                (
-                    budget_data.user_id,
-                    budget_data.amount,
-                    budget_data.start_date,
-                    budget_data.end_date,
-                ),
-            )
-            conn.commit()
-
-            budget_id = cursor.lastrowid
-            cursor.execute(
-                "SELECT * FROM budgets WHERE budget_id = %s",
-                (budget_id,),
-            )
-            row = cursor.fetchone()
-            cursor.close()
-
-            return JSONResponse(
-                status_code=200,
-                content=jsonable_encoder(
-                    BudgetSuccessResponse(
-                        success=True,
-                        message="Budget created",
-                        results=Budget(**dict(zip(column_names, row))),
-                    ).model_dump()
-                ),
-            )
-    except MYSQLError as e:
-        logger.error(f"MySQL error: {e}")
-        return error_response(e)
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return error_response(e)
-
-
-@router.put(
-    "/put_budget",
-    responses={
-        200: {"model": BudgetSuccessResponse},
-        404: {"model": BaseErrorResponse},
-        422: {"model": BaseErrorResponse},
-        500: {"model": BaseErrorResponse},
-    },
-)
-def update_budget(update_data: UpdateBudget, request: Request):
-    try:
-        if conn:
-            vuser: User = request.state.user
-            if not vuser:
-                return auth_error_response()
-
-            uud = update_data.model_dump(exclude_none=True)
-            budget_id = uud.get("budget_id")
-
-            if not budget_id:
-                return validation_error_response("budget_id is required")
-
-            update_fields = {k: v for k, v in uud.items() if k != "budget_id"}
-            if not update_fields:
-                return validation_error_response("No fields provided to update")
-
-            set_clause = ", ".join(f"{k} = %s" for k in update_fields)
-            values = tuple(update_fields.values()) + (budget_id,)
-            cursor = conn.cursor()
-            cursor.execute(
-                f"UPDATE budgets SET {set_clause} WHERE budget_id = %s",
-                values,
-            )
-            conn.commit()
-
-            if cursor.rowcount == 0:
-                cursor.close()
-                return not_found_response(
-                    f"Budget ID {budget_id} not found or not updated"
-                )
-
-            cursor.execute(
-                "SELECT * FROM budgets WHERE budget_id = %s",
-                (budget_id,),
-            )
-            row = cursor.fetchone()
-            cursor.close()
-
-            return JSONResponse(
-                status_code=200,
-                content=jsonable_encoder(
-                    BudgetSuccessResponse(
-                        success=True,
-                        message="Budget updated",
-                        results=Budget(**dict(zip(column_names, row))),
-                    ).model_dump()
-                ),
-            )
-    except MYSQLError as e:
-        logger.error(f"MySQL error: {e}")
-        return error_response(e)
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return error_response(e)
-
-
-@router.delete(
-    "/delete_budget/{budget_id}",
-    responses={
-        200: {"model": BudgetSuccessResponse},
-        404: {"model": BaseErrorResponse},
-        500: {"model": BaseErrorResponse},
-    },
-)
-def delete_budget(budget_id: int, request: Request):
-    try:
-        if conn:
-            vuser: User = request.state.user
-            if not vuser:
-                return auth_error_response()
-
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT * FROM budgets WHERE budget_id = %s",
-                (budget_id,),
-            )
-            row = cursor.fetchone()
-
-            if not row:
-                cursor.close()
-                return not_found_response(f"Budget ID {budget_id} not found")
-
-            budget = Budget(**dict(zip(column_names, row)))
-            cursor.execute("DELETE FROM budgets WHERE budget_id = %s", (budget_id,))
-            conn.commit()
-            cursor.close()
-
-            return JSONResponse(
-                status_code=200,
-                content=jsonable_encoder(
-                    BudgetSuccessResponse(
-                        success=True,
-                        message="Budget deleted",
-                        results=budget,
-                    ).model_dump()
-                ),
-            )
-    except MYSQLError as e:
-        logger.error(f"MySQL error: {e}")
-        return error_response(e)
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        return error_response(e)
-
-
-# Reuse shared utilities from transaction router
-def error_response(e: Exception):
-    return JSONResponse(
-        status_code=500,
-        content=BaseErrorResponse(
-            success=False, errorType=type(e).__name__, error=str(e)
-        ).model_dump(),
-    )
-
-
-def auth_error_response():
-    return JSONResponse(
-        status_code=401,
-        content=BaseErrorResponse(
-            success=False, errorType="AuthRequired", error="User is not authenticated."
-        ).model_dump(),
-    )
-
-
-def validation_error_response(msg: str):
-    return JSONResponse(
-        status_code=422,
-        content=BaseErrorResponse(
-            success=False, errorType="ValidationError", error=msg
-        ).model_dump(),
-    )
-
-
-def not_found_response(msg: str):
-    return JSONResponse(
-        status_code=404,
-        content=BaseErrorResponse(
-            success=False, errorType="NotFoundError", error=msg
-        ).model_dump(),
-    )
@@ -0,0 +1,918 @@
+from fastapi import APIRouter, Request, Query, Path, Depends
+from pydantic import Field, ValidationError, create_model
+from mysql.connector import Error as MYSQLError
+from functools import wraps
+from typing import Annotated, Callable, Optional
+from datetime import date, timedelta
+from decimal import Decimal
+from enum import Enum
+from json import loads as json_loads
+from schemas import (
+    BaseSuccessResponse,
+    BaseErrorResponse,
+    ExportFormat,
+    ReturnPreference,
+)
+from db.retry import retry_transaction
+from db.shards import UserMovingError
+from db.session import (
+    Session,
+    get_lazy_read_session,
+    get_session,
+    get_user_session,
+    read_target,
+    recent_writes,
+    replicas_configured,
+)
+from db.bulk import (
+    MAX_BULK_ROWS,
+    delete_many,
+    in_clause,
+    insert_many,
+    lock_rows,
+    padded,
+    update_many,
+)
+from db.rollups import apply_rollups
+from db.versions import bump_versions, current_version, next_change
+from db.tombstones import add_tombstones
+from utils.export import export_response
+from utils.logger import logger
+from utils.responses import (
+    ModelResponse,
+    etag_headers,
+    etag_matches,
+    not_modified_response,
+    auth_error_response,
+    error_response,
+    not_found_response,
+    unavailable_response,
+    validation_error_response,
+)
+from utils.response_cache import request_key, response_cache
+from utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursorError,
+    keyset_query,
+    split_page,
+)
+
+ROUTES = frozenset(
+    {
+        "get",
+        "get_many",
+        "get_all",
+        "export",
+        "create",
+        "create_many",
+        "update",
+        "update_many",
+        "delete",
+        "delete_many",
+    }
+)
+
+
+class Resource:
+    """Descriptor of one table served by `crud_router`.
+
+    All SQL is compiled here once, against the explicit column list of
+    ``model``, so handlers only bind parameters. Rows owned through
+    ``owner_column`` are always scoped to the authenticated user: they are
+    created as theirs whatever the body says, and never change owner.
+    """
+
+    def __init__(
+        self,
+        *,
+        table: str,
+        pk: str,
+        model,
+        create_schema,
+        update_schema,
+        singular: str,
+        plural: str,
+        label: str,
+        owner_column: Optional[str] = "user_id",
+        sort_column: str = "created_at",
+        date_column: Optional[str] = None,
+        amount_column: Optional[str] = "amount",
+        type_column: Optional[str] = None,
+        search_columns=(),
+        insert_columns=None,
+        update_columns=None,
+        timestamp_columns=("created_at",),
+        updated_column: Optional[str] = None,
+        routes=ROUTES - {"export"},
+        public=frozenset(),
+        check: Optional[Callable] = None,
+        prepare: Optional[Callable] = None,
+        rollup: Optional[Callable] = None,
+        after_write: Optional[Callable] = None,
+        after_delete: Optional[Callable] = None,
+    ):
+        self.table = table
+        self.pk = pk
+        self.model = model
+        self.create_schema = create_schema
+        self.update_schema = update_schema
+        self.singular = singular
+        self.plural = plural
+        self.label = label
+        self.plural_label = f"{label.lower()}s"
+        self.owner_column = owner_column
+        self.sort_column = sort_column
+        self.date_column = date_column or sort_column
+        self.amount_column = amount_column
+        self.type_column = type_column
+        self.search_columns = list(search_columns)
+        self.routes = routes
+        self.public = public
+        self.check = check
+        self.prepare = prepare or (lambda fields: fields)
+        self.rollup = rollup
+        self.after_write = after_write
+        self.after_delete = after_delete
+        self.updated_column = updated_column
+
+        self.columns = list(model.model_fields)
+        self.enum_columns = {
+            name: field.annotation
+            for name, field in model.model_fields.items()
+            if isinstance(field.annotation, type) and issubclass(field.annotation, Enum)
+        }
+        self.column_list = ", ".join(self.columns)
+        self.insert_columns = list(insert_columns or create_schema.model_fields)
+        self.timestamp_columns = list(timestamp_columns)
+        # Owned rows carry their owner's change number (see next_change),
+        # written by the INSERT or UPDATE itself.
+        self.change_column = "change_seq" if owner_column else None
+
+        owner_clause = f" AND {owner_column} = %s" if owner_column else ""
+        select = f"SELECT {self.column_list} FROM {table}"
+        self.select_pk_sql = f"{select} WHERE {pk} = %s"
+        self.select_one_sql = self.select_pk_sql + owner_clause
+        self.lock_one_sql = self.select_one_sql + " FOR UPDATE"
+        self.select_many_sql = f"{select} WHERE {pk} IN {{}}{owner_clause}"
+        self.select_all_sql = f"{select} WHERE {owner_column} = %s"
+        self.export_sql = f"{self.select_all_sql} ORDER BY {sort_column}, {pk}"
+        self.all_insert_columns = self.insert_columns + self.timestamp_columns
+        if self.change_column:
+            self.all_insert_columns.append(self.change_column)
+        self.insert_sql = (
+            f"INSERT INTO {table} ({', '.join(self.all_insert_columns)}) "
+            f"VALUES {in_clause(self.all_insert_columns)}"
+        )
+        self.delete_one_sql = f"DELETE FROM {table} WHERE {pk} = %s"
+
+        # Every column is always assigned, NULL meaning "keep", so updates
+        # have a single shape whichever fields a patch carries.
+        self.update_columns = list(
+            update_columns
+            or [
+                field
+                for field in update_schema.model_fields
+                if field not in (pk, owner_column)
+            ]
+        )
+        if updated_column:
+            self.update_columns.append(updated_column)
+        if self.change_column:
+            self.update_columns.append(self.change_column)
+        self.update_sql = (
+            f"UPDATE {table} SET "
+            + ", ".join(
+                f"{column} = COALESCE(%s, {column})" for column in self.update_columns
+            )
+            + f" WHERE {pk} = %s"
+        )
+
+    def list_query_fields(self) -> dict:
+        fields = {
+            "limit": (int, Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)),
+            "cursor": (Optional[str], None),
+            "from_date": (Optional[date], None),
+            "to_date": (Optional[date], None),
+        }
+        if self.amount_column:
+            fields["min_amount"] = (Optional[Decimal], None)
+            fields["max_amount"] = (Optional[Decimal], None)
+        if self.type_column:
+            fields["type"] = (Optional[self.enum_columns[self.type_column]], None)
+        if self.search_columns:
+            fields["q"] = (Optional[str], Field(None, min_length=1, max_length=100))
+        return fields
+
+    def filter_clause(self, filters) -> tuple:
+        """Compile list filters into ``AND ...`` predicates and parameters.
+
+        Dates are half-open ranges on ``date_column`` so the same predicate
+        works for DATE and DATETIME columns, and together with the amount
+        bounds stays inside the ``(user_id, date, amount)`` index.
+        """
+        clauses, params = [], []
+        if filters.from_date:
+            clauses.append(f"{self.date_column} >= %s")
+            params.append(filters.from_date)
+        if filters.to_date:
+            clauses.append(f"{self.date_column} < %s")
+            params.append(filters.to_date + timedelta(days=1))
+        if getattr(filters, "min_amount", None) is not None:
+            clauses.append(f"{self.amount_column} >= %s")
+            params.append(filters.min_amount)
+        if getattr(filters, "max_amount", None) is not None:
+            clauses.append(f"{self.amount_column} <= %s")
+            params.append(filters.max_amount)
+        if getattr(filters, "type", None):
+            clauses.append(f"{self.type_column} = %s")
+            params.append(filters.type.value)
+        if getattr(filters, "q", None):
+            pattern = "%" + escape_like(filters.q) + "%"
+            clauses.append(
+                "("
+                + " OR ".join(f"{column} LIKE %s" for column in self.search_columns)
+                + ")"
+            )
+            params += [pattern] * len(self.search_columns)
+        return "".join(f" AND {clause}" for clause in clauses), tuple(params)
+
+    def owner(self, vuser) -> tuple:
+        return (vuser.user_id,) if self.owner_column else ()
+
+    def to_dict(self, row) -> dict:
+        return dict(zip(self.columns, row))
+
+    def to_model(self, row):
+        return self.from_dict(dict(zip(self.columns, row)))
+
+    def from_dict(self, values: dict):
+        # Rows come from our own tables or from already validated input, so
+        # they skip validation; only ENUM columns need converting from str.
+        for column, enum in self.enum_columns.items():
+            values[column] = enum(values[column])
+        return self.model.model_construct(**values)
+
+    def new_row(self, row_id: int, values: dict, now) -> dict:
+        return {
+            self.pk: row_id,
+            **values,
+            **{column: now for column in self.timestamp_columns},
+        }
+
+    def insert_values(self, values: dict, now, change_seq) -> tuple:
+        return (
+            tuple(values[column] for column in self.insert_columns)
+            + (now,) * len(self.timestamp_columns)
+            + ((change_seq,) if self.change_column else ())
+        )
+
+    def stamp(self, fields: dict, now, change_seq) -> dict:
+        # Columns every update assigns, next to the patched ones.
+        if self.updated_column:
+            fields[self.updated_column] = now
+        if self.change_column:
+            fields[self.change_column] = change_seq
+        return fields
+
+    def update_values(self, fields: dict) -> tuple:
+        return tuple(fields.get(column) for column in self.update_columns)
+
+    def check_update(self, new_row: dict) -> Optional[str]:
+        # Updates are checked on the merged row, as creates on their input.
+        return self.check(self.from_dict(dict(new_row))) if self.check else None
+
+    def owned(self, values: dict, vuser) -> dict:
+        if self.owner_column:
+            values[self.owner_column] = vuser.user_id
+        return values
+
+    def patch(self, update) -> tuple:
+        fields = self.prepare(update.model_dump(exclude_none=True))
+        fields.pop(self.owner_column, None)
+        return fields.pop(self.pk, None), fields
+
+    async def next_change(self, db, vuser) -> Optional[int]:
+        # Taken right before the write, which records it on the rows it
+        # writes (or, for deletes, on their tombstones) for /sync.
+        if self.change_column:
+            return await next_change(db, vuser.user_id)
+
+    async def record_changes(
+        self, db, change_seq=None, added=(), removed=(), deleted=False
+    ):
+        # Runs before the commit of every write: keeps the monthly rollups
+        # in step, bumps the owner's version of this table for the ETags, and
+        # when ``deleted`` leaves tombstones of the removed rows for /sync.
+        if self.owner_column:
+            await bump_versions(
+                db,
+                self.table,
+                [row[self.owner_column] for row in (*added, *removed)],
+            )
+            if deleted:
+                await add_tombstones(
+                    db,
+                    self.table,
+                    [(row[self.owner_column], row[self.pk]) for row in removed],
+                    await db.now(),
+                    change_seq,
+                )
+        if self.rollup:
+            await apply_rollups(
+                db,
+                [self.rollup(row) for row in added],
+                removed=[self.rollup(row) for row in removed],
+            )
+
+    async def commit(self, db, rows):
+        # Cached reads are invalidated only once the write is visible, so a
+        # concurrent read cannot cache the old rows again afterwards. The
+        # owners' reads stick to the primary until replicas have caught up,
+        # and that starts first: a read seeing the new cache generation must
+        # also see the marker, or it could cache a lagging replica's rows
+        # under that generation.
+        await db.commit()
+        if not self.owner_column:
+            return
+        for user_id in {row[self.owner_column] for row in rows}:
+            if replicas_configured():
+                await recent_writes.mark(user_id)
+            if response_cache.enabled:
+                await response_cache.invalidate(user_id, self.table)
+
+    def written(self, old: Optional[dict], new: Optional[dict]):
+        if self.after_write:
+            self.after_write(old, new)
+
+    async def deleted(self, rows):
+        # Runs once the delete is committed, for cleanup outside its session.
+        if self.after_delete:
+            await self.after_delete(rows)
+
+
+def escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def check_filters(filters) -> Optional[str]:
+    if filters.from_date and filters.to_date and filters.to_date < filters.from_date:
+        return "to_date must not be before from_date"
+    min_amount = getattr(filters, "min_amount", None)
+    max_amount = getattr(filters, "max_amount", None)
+    if min_amount is not None and max_amount is not None and max_amount < min_amount:
+        return "max_amount must not be below min_amount"
+
+
+def parse_ids(raw: str):
+    try:
+        ids = json_loads(raw)
+    except ValueError:
+        return None
+    if (
+        not isinstance(ids, list)
+        or not all(isinstance(row_id, int) for row_id in ids)
+        or not 0 < len(ids) <= MAX_BULK_ROWS
+    ):
+        return None
+    return list(dict.fromkeys(ids))
+
+
+def handle_errors(handler):
+    retrying = retry_transaction(handler)
+
+    @wraps(handler)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await retrying(*args, **kwargs)
+        except InvalidCursorError as e:
+            return validation_error_response(str(e))
+        except UserMovingError as e:
+            return unavailable_response(str(e), e.retry_after)
+        except ValidationError as e:
+            logger.error(f"Validation error: {e}")
+            return validation_error_response(e.json())
+        except MYSQLError as e:
+            logger.error(f"MySQL error: {e}")
+            return error_response(e)
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+            return error_response(e)
+
+    return wrapper
+
+
+def crud_router(r: Resource, prefix: str) -> APIRouter:
+    router = APIRouter(prefix=prefix)
+    name = r.model.__name__
+
+    OneResponse = create_model(
+        f"{name}SuccessResponse", __base__=BaseSuccessResponse, results=(r.model, ...)
+    )
+    ManyResponse = create_model(
+        f"{name}sSuccessResponse",
+        __base__=BaseSuccessResponse,
+        results=(list[r.model], ...),
+    )
+    PageResponse = create_model(
+        f"{name}sPageSuccessResponse",
+        __base__=ManyResponse,
+        next_cursor=(Optional[str], None),
+    )
+    IdsResponse = create_model(
+        f"{name}sIdsSuccessResponse",
+        __base__=BaseSuccessResponse,
+        results=(list[int], ...),
+    )
+
+    def one_response(message: str, result):
+        return ModelResponse(
+            status_code=200,
+            content=OneResponse.model_construct(
+                success=True, message=message, results=result
+            ),
+        )
+
+    def ids_response(message: str, ids):
+        return ModelResponse(
+            status_code=200,
+            content=IdsResponse.model_construct(
+                success=True, message=message, results=ids
+            ),
+        )
+
+    # Owned rows live on their owner's shard, and only they can tell whose
+    # recent writes a read must see; the rest stay on the primary. Reads of
+    # owned rows check out nothing until `cached` misses.
+    read_session = get_lazy_read_session if r.owner_column else get_session
+    write_session = get_user_session if r.owner_column else get_session
+
+    def authorized(route: str, vuser) -> bool:
+        return bool(vuser) or route in r.public
+
+    def cached(handler):
+        # Successful reads of owned rows are served from, and stored in, the
+        # response cache; Resource.commit invalidates them.
+        @wraps(handler)
+        async def wrapper(*args, **kwargs):
+            request = kwargs["request"]
+            vuser = request.state.user
+            if not (vuser and r.owner_column and response_cache.enabled):
+                return await handler(*args, **kwargs)
+
+            key = request_key(request)
+            hit, generation = await response_cache.lookup(vuser.user_id, r.table, key)
+            if hit:
+                return hit.to_response(request)
+
+            response = await handler(*args, **kwargs)
+            if response.status_code == 200:
+                await response_cache.store(
+                    vuser.user_id, r.table, key, generation, response
+                )
+            return response
+
+        return wrapper
+
+    error_responses = {
+        401: {"model": BaseErrorResponse},
+        404: {"model": BaseErrorResponse},
+        422: {"model": BaseErrorResponse},
+        500: {"model": BaseErrorResponse},
+        503: {"model": BaseErrorResponse},
+    }
+
+    if "get" in r.routes:
+
+        @router.get(
+            f"/get_{r.singular}/{{{r.pk}}}",
+            name=f"get_{r.singular}",
+            responses={200: {"model": OneResponse}, **error_responses},
+        )
+        @handle_errors
+        @cached
+        async def get_one(
+            request: Request,
+            row_id: int = Path(alias=r.pk),
+            db: Session = Depends(read_session),
+        ):
+            vuser = request.state.user
+            if not authorized("get", vuser):
+                return auth_error_response()
+
+            row = await db.fetchone(r.select_one_sql, (row_id,) + r.owner(vuser))
+            if not row:
+                return not_found_response(f"{r.label} ID {row_id} not found")
+
+            return one_response(f"{r.label} fetched successfully", r.to_model(row))
+
+    if "get_many" in r.routes:
+
+        @router.get(
+            f"/get_{r.plural}",
+            name=f"get_{r.plural}",
+            responses={200: {"model": ManyResponse}, **error_responses},
+        )
+        @handle_errors
+        @cached
+        async def get_many(
+            request: Request,
+            ids: str = Query(..., alias=f"{r.singular}_ids"),
+            db: Session = Depends(read_session),
+        ):
+            vuser = request.state.user
+            if not authorized("get_many", vuser):
+                return auth_error_response()
+
+            row_ids = parse_ids(ids)
+            if row_ids is None:
+                return validation_error_response(
+                    f"{r.singular}_ids must be a list of 1 to {MAX_BULK_ROWS} integers"
+                )
+
+            padded_ids = padded(row_ids)
+            rows = await db.fetchall(
+                r.select_many_sql.format(in_clause(padded_ids)),
+                tuple(padded_ids) + r.owner(vuser),
+            )
+            if not rows:
+                return not_found_response(
+                    f"No {r.plural_label} found for IDs {row_ids}"
+                )
+
+            return ModelResponse(
+                status_code=200,
+                content=ManyResponse.model_construct(
+                    success=True,
+                    message=f"{r.label}s fetched successfully",
+                    results=[r.to_model(row) for row in rows],
+                ),
+            )
+
+    if "get_all" in r.routes:
+        ListQuery = create_model(f"{name}sListQuery", **r.list_query_fields())
+
+        @router.get(
+            f"/get_all_{r.plural}",
+            name=f"get_all_{r.plural}",
+            responses={200: {"model": PageResponse}, **error_responses},
+        )
+        @handle_errors
+        @cached
+        async def get_all(
+            request: Request,
+            query: Annotated[ListQuery, Query()],
+            db: Session = Depends(read_session),
+        ):
+            vuser = request.state.user
+            if not authorized("get_all", vuser):
+                return auth_error_response()
+
+            error = check_filters(query)
+            if error:
+                return validation_error_response(error)
+
+            # The version is one primary-key read; an unchanged listing is
+            # answered with a 304 before any of its rows are fetched.
+            headers = {}
+            if r.owner_column:
+                version = await current_version(db, r.table, vuser.user_id)
+                etag = f'"{r.table}.{vuser.user_id}.{version}"'
+                if etag_matches(request, etag):
+                    return not_modified_response(etag)
+                headers = etag_headers(etag)
+
+            where, where_params = r.filter_clause(query)
+
+            sql, params = keyset_query(
+                r.table,
+                r.sort_column,
+                r.pk,
+                vuser.user_id,
+                query.cursor,
+                query.limit,
+                columns=r.column_list,
+                where=where,
+                where_params=where_params,
+            )
+            rows = await db.fetchall(sql, params)
+            if not rows:
+                return not_found_response(
+                    f"No {r.plural_label} found for user ID {vuser.user_id}"
+                )
+
+            rows, next_cursor = split_page(
+                rows,
+                query.limit,
+                r.columns.index(r.sort_column),
+                r.columns.index(r.pk),
+            )
+            return ModelResponse(
+                status_code=200,
+                content=PageResponse.model_construct(
+                    success=True,
+                    message=f"{r.label}s fetched successfully",
+                    results=[r.to_model(row) for row in rows],
+                    next_cursor=next_cursor,
+                ),
+                headers=headers,
+            )
+
+    if "export" in r.routes:
+
+        @router.get(
+            f"/export_{r.plural}",
+            name=f"export_{r.plural}",
+            responses={401: {"model": BaseErrorResponse}},
+        )
+        async def export(
+            request: Request,
+            fmt: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+        ):
+            vuser = request.state.user
+            if not authorized("export", vuser):
+                return auth_error_response()
+
+            return export_response(
+                r.export_sql,
+                (vuser.user_id,),
+                r.columns,
+                fmt,
+                r.plural,
+                target=await read_target(vuser.user_id),
+            )
+
+    if "create" in r.routes:
+
+        @router.post(
+            f"/post_{r.singular}",
+            name=f"create_{r.singular}",
+            responses={200: {"model": OneResponse}, **error_responses},
+        )
+        @handle_errors
+        async def create_one(
+            data: r.create_schema,
+            request: Request,
+            return_pref: Optional[ReturnPreference] = Query(None, alias="return"),
+            db: Session = Depends(write_session),
+        ):
+            vuser = request.state.user
+            if not authorized("create", vuser):
+                return auth_error_response()
+
+            error = r.check(data) if r.check else None
+            if error:
+                return validation_error_response(error)
+
+            values = r.owned(r.prepare(data.model_dump()), vuser)
+            now = await db.now()
+            change_seq = await r.next_change(db, vuser)
+            result = await db.execute(
+                r.insert_sql, r.insert_values(values, now, change_seq)
+            )
+            row = r.new_row(result.lastrowid, values, now)
+            await r.record_changes(db, change_seq, added=[row])
+            await r.commit(db, [row])
+            r.written(None, row)
+
+            if return_pref == ReturnPreference.REPRESENTATION:
+                model = r.to_model(
+                    await db.fetchone(r.select_pk_sql, (result.lastrowid,))
+                )
+            else:
+                model = r.from_dict(row)
+
+            return one_response(f"{r.label} created", model)
+
+    if "create_many" in r.routes:
+
+        @router.post(
+            f"/post_{r.plural}",
+            name=f"create_{r.plural}",
+            responses={200: {"model": IdsResponse}, **error_responses},
+        )
+        @handle_errors
+        async def create_many(
+            items: list[r.create_schema],
+            request: Request,
+            db: Session = Depends(write_session),
+        ):
+            vuser = request.state.user
+            if not authorized("create_many", vuser):
+                return auth_error_response()
+
+            if not 0 < len(items) <= MAX_BULK_ROWS:
+                return validation_error_response(
+                    f"Between 1 and {MAX_BULK_ROWS} {r.plural_label} can be created at once"
+                )
+
+            for index, item in enumerate(items):
+                error = r.check(item) if r.check else None
+                if error:
+                    return validation_error_response(f"{r.label} {index}: {error}")
+
+            values = [r.owned(r.prepare(item.model_dump()), vuser) for item in items]
+            now = await db.now()
+            change_seq = await r.next_change(db, vuser)
+            ids = await insert_many(
+                db,
+                r.table,
+                r.all_insert_columns,
+                [r.insert_values(item, now, change_seq) for item in values],
+            )
+            rows = [r.new_row(row_id, item, now) for row_id, item in zip(ids, values)]
+            await r.record_changes(db, change_seq, added=rows)
+            await r.commit(db, rows)
+            for row in rows:
+                r.written(None, row)
+
+            return ids_response(f"{len(ids)} {r.plural_label} created", ids)
+
+    if "update" in r.routes:
+
+        @router.put(
+            f"/put_{r.singular}",
+            name=f"update_{r.singular}",
+            responses={200: {"model": OneResponse}, **error_responses},
+        )
+        @handle_errors
+        async def update_one(
+            update: r.update_schema,
+            request: Request,
+            return_pref: Optional[ReturnPreference] = Query(None, alias="return"),
+            db: Session = Depends(write_session),
+        ):
+            vuser = request.state.user
+            if not authorized("update", vuser):
+                return auth_error_response()
+
+            row_id, fields = r.patch(update)
+            if not row_id:
+                return validation_error_response(f"{r.pk} is required")
+            if not fields:
+                return validation_error_response("No fields provided to update")
+
+            old = await db.fetchone(r.lock_one_sql, (row_id,) + r.owner(vuser))
+            if not old:
+                return not_found_response(f"{r.label} ID {row_id} not found")
+
+            old_row = r.to_dict(old)
+            error = r.check_update({**old_row, **fields})
+            if error:
+                return validation_error_response(error)
+
+            change_seq = await r.next_change(db, vuser)
+            r.stamp(fields, await db.now(), change_seq)
+            await db.execute(r.update_sql, r.update_values(fields) + (row_id,))
+
+            if return_pref == ReturnPreference.REPRESENTATION:
+                new_row = r.to_dict(await db.fetchone(r.select_pk_sql, (row_id,)))
+            else:
+                # The locked pre-image plus the applied changes is the new row.
+                new_row = {**old_row, **fields}
+            await r.record_changes(db, change_seq, added=[new_row], removed=[old_row])
+            await r.commit(db, [old_row, new_row])
+            r.written(old_row, new_row)
+
+            return one_response(f"{r.label} updated", r.from_dict(new_row))
+
+    if "update_many" in r.routes:
+
+        @router.put(
+            f"/put_{r.plural}",
+            name=f"update_{r.plural}",
+            responses={200: {"model": IdsResponse}, **error_responses},
+        )
+        @handle_errors
+        async def update_many_rows(
+            patches: list[r.update_schema],
+            request: Request,
+            db: Session = Depends(write_session),
+        ):
+            vuser = request.state.user
+            if not authorized("update_many", vuser):
+                return auth_error_response()
+
+            if not 0 < len(patches) <= MAX_BULK_ROWS:
+                return validation_error_response(
+                    f"Between 1 and {MAX_BULK_ROWS} {r.plural_label} can be updated at once"
+                )
+
+            changes = {}
+            now = await db.now()
+            for patch in patches:
+                row_id, fields = r.patch(patch)
+                if not fields:
+                    return validation_error_response(
+                        f"No fields provided to update for {r.label} ID {row_id}"
+                    )
+                if row_id in changes:
+                    return validation_error_response(
+                        f"{r.label} ID {row_id} appears more than once"
+                    )
+                changes[row_id] = fields
+
+            rows = await lock_rows(
+                db, r.table, r.pk, list(changes), vuser.user_id, r.column_list
+            )
+            missing = sorted(set(changes) - {row[0] for row in rows})
+            if missing:
+                return not_found_response(f"{r.label} IDs {missing} not found")
+
+            old_rows = [r.to_dict(row) for row in rows]
+            for old in old_rows:
+                error = r.check_update({**old, **changes[old[r.pk]]})
+                if error:
+                    return validation_error_response(
+                        f"{r.label} ID {old[r.pk]}: {error}"
+                    )
+
+            change_seq = await r.next_change(db, vuser)
+            for fields in changes.values():
+                r.stamp(fields, now, change_seq)
+            new_rows = [{**old, **changes[old[r.pk]]} for old in old_rows]
+            await update_many(
+                db, r.table, r.pk, r.update_columns, changes, vuser.user_id
+            )
+            await r.record_changes(db, change_seq, added=new_rows, removed=old_rows)
+            await r.commit(db, old_rows + new_rows)
+            for old, new in zip(old_rows, new_rows):
+                r.written(old, new)
+
+            return ids_response(
+                f"{len(changes)} {r.plural_label} updated", list(changes)
+            )
+
+    if "delete" in r.routes:
+
+        @router.delete(
+            f"/delete_{r.singular}/{{{r.pk}}}",
+            name=f"delete_{r.singular}",
+            responses={200: {"model": OneResponse}, **error_responses},
+        )
+        @handle_errors
+        async def delete_one(
+            request: Request,
+            row_id: int = Path(alias=r.pk),
+            db: Session = Depends(write_session),
+        ):
+            vuser = request.state.user
+            if not authorized("delete", vuser):
+                return auth_error_response()
+
+            old = await db.fetchone(r.lock_one_sql, (row_id,) + r.owner(vuser))
+            if not old:
+                return not_found_response(f"{r.label} ID {row_id} not found")
+
+            change_seq = await r.next_change(db, vuser)
+            await db.execute(r.delete_one_sql, (row_id,))
+            old_row = r.to_dict(old)
+            await r.record_changes(db, change_seq, removed=[old_row], deleted=True)
+            await r.commit(db, [old_row])
+            r.written(old_row, None)
+            await r.deleted([old_row])
+
+            return one_response(f"{r.label} deleted", r.from_dict(old_row))
+
+    if "delete_many" in r.routes:
+
+        @router.delete(
+            f"/delete_{r.plural}",
+            name=f"delete_{r.plural}",
+            responses={200: {"model": IdsResponse}, **error_responses},
+        )
+        @handle_errors
+        async def delete_many_rows(
+            request: Request,
+            ids: str = Query(..., alias=f"{r.singular}_ids"),
+            db: Session = Depends(write_session),
+        ):
+            vuser = request.state.user
+            if not authorized("delete_many", vuser):
+                return auth_error_response()
+
+            row_ids = parse_ids(ids)
+            if row_ids is None:
+                return validation_error_response(
+                    f"{r.singular}_ids must be a list of 1 to {MAX_BULK_ROWS} integers"
+                )
+
+            rows = await lock_rows(
+                db, r.table, r.pk, row_ids, vuser.user_id, r.column_list
+            )
+            missing = sorted(set(row_ids) - {row[0] for row in rows})
+            if missing:
+                return not_found_response(f"{r.label} IDs {missing} not found")
+
+            change_seq = await r.next_change(db, vuser)
+            await delete_many(db, r.table, r.pk, row_ids, vuser.user_id)
+            old_rows = [r.to_dict(row) for row in rows]
+            await r.record_changes(db, change_seq, removed=old_rows, deleted=True)
+            await r.commit(db, old_rows)
+            for old in old_rows:
+                r.written(old, None)
+            await r.deleted(old_rows)
+
+            return ids_response(f"{len(row_ids)} {r.plural_label} deleted", row_ids)
+
+    return router
@@ -0,0 +1,67 @@
+from asyncio import gather
+from fastapi import APIRouter
+from schemas import BaseSuccessResponse, BaseErrorResponse
+from db.session import get_shard_pools, session_scope
+from db.migrations import LATEST_VERSION
+from utils.logger import logger
+from utils.responses import ModelResponse
+
+router = APIRouter(prefix="/health")
+
+
+@router.get(
+    "/live",
+    responses={200: {"model": BaseSuccessResponse}},
+)
+async def live():
+    # Liveness only says the process is serving requests; it never touches
+    # the database, so a database outage does not get replicas restarted.
+    return ModelResponse(
+        status_code=200,
+        content=BaseSuccessResponse(success=True, message="Alive"),
+    )
+
+
+@router.get(
+    "/ready",
+    responses={
+        200: {"model": BaseSuccessResponse},
+        503: {"model": BaseErrorResponse},
+    },
+)
+async def ready():
+    # Ready once the primary and every shard answer (within
+    # DB_CONNECT_TIMEOUT, checked concurrently) and their schemas are at the
+    # version this build expects.
+    shards = [None] + list(range(len(get_shard_pools())))
+    try:
+        versions = await gather(*(schema_version(shard) for shard in shards))
+    except Exception as e:
+        logger.error(f"Readiness check failed: {e}")
+        return not_ready_response(f"Database unavailable: {e}")
+
+    for shard, version in zip(shards, versions):
+        if version < LATEST_VERSION:
+            where = "" if shard is None else f" on shard {shard}"
+            return not_ready_response(
+                f"Schema{where} is at version {version}, expected "
+                f"{LATEST_VERSION}; run python -m db.migrations"
+            )
+
+    return ModelResponse(
+        status_code=200,
+        content=BaseSuccessResponse(success=True, message="Ready"),
+    )
+
+
+async def schema_version(shard) -> int:
+    async with session_scope(shard=shard) as db:
+        row = await db.fetchone("SELECT MAX(version) FROM schema_migrations")
+    return row[0] if row and row[0] is not None else 0
+
+
+def not_ready_response(msg: str):
+    return ModelResponse(
+        status_code=503,
+        content=BaseErrorResponse(success=False, errorType="NotReady", error=msg),
+    )
@@ -0,0 +1,92 @@
+from fastapi import APIRouter, status
+from schemas import BaseSuccessResponse
+from pydantic import BaseModel
+from typing import Optional
+from db.retry import retry_stats
+from db.session import get_replicas
+from db.statements import statement_stats
+from utils.user_cache import user_cache
+from utils.response_cache import response_cache
+from utils.responses import ModelResponse
+
+router = APIRouter(prefix="/metrics")
+
+
+class CacheStats(BaseModel):
+    size: int
+    maxsize: int
+    ttl: float
+    hits: int
+    misses: int
+    evictions: int
+
+
+class ResponseCacheStats(BaseModel):
+    backend: str
+    size: Optional[int]
+    counters: Optional[int]
+    maxsize: Optional[int]
+    evictions: Optional[int]
+    ttl: int
+    hits: int
+    misses: int
+    errors: int
+    hit_rate: float
+
+
+class StatementStats(BaseModel):
+    prepared: int
+    closed: int
+    executed: int
+    text: int
+
+
+class ReplicaStats(BaseModel):
+    name: str
+    in_use: int
+    checkouts: int
+    failures: int
+    down: bool
+
+
+class MetricsResults(BaseModel):
+    user_cache: CacheStats
+    response_cache: ResponseCacheStats
+    # "<event>.<kind>", e.g. "statement_retries.deadlock" or "reconnects.connection"
+    db_retries: dict[str, int]
+    statements: StatementStats
+    replicas: list[ReplicaStats]
+
+
+class MetricsSuccessResponse(BaseSuccessResponse):
+    results: MetricsResults
+
+
+@router.get(
+    "",
+    responses={
+        200: {
+            "model": MetricsSuccessResponse,
+            "description": "Metrics fetched successfully",
+        },
+    },
+)
+async def get_metrics():
+    replicas = get_replicas()
+    return ModelResponse(
+        status_code=status.HTTP_200_OK,
+        content=MetricsSuccessResponse(
+            success=True,
+            message="Fetched process metrics.",
+            results=MetricsResults(
+                user_cache=CacheStats(**user_cache.stats()),
+                response_cache=ResponseCacheStats(**response_cache.stats()),
+                db_retries=retry_stats.stats(),
+                statements=StatementStats(**statement_stats.stats()),
+                replicas=[
+                    ReplicaStats(**replica)
+                    for replica in (replicas.stats() if replicas else [])
+                ],
+            ),
+        ),
+    )
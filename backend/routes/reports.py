@@ -0,0 +1,220 @@
+from calendar import monthrange
+from fastapi import APIRouter, Request, Query, Depends
+from mysql.connector import Error as MYSQLError
+from datetime import date
+from decimal import Decimal
+from schemas import (
+    User,
+    BaseSuccessResponse,
+    BaseErrorResponse,
+    PeriodTotal,
+    ReportBucket,
+    ReportGranularity,
+    SummaryReport,
+    TotalsReport,
+)
+from db.session import Session, get_read_session
+from utils.logger import logger
+from utils.responses import (
+    ModelResponse,
+    auth_error_response,
+    error_response,
+    validation_error_response,
+)
+
+router = APIRouter(prefix="/reports")
+
+
+class SummaryReportSuccessResponse(BaseSuccessResponse):
+    results: SummaryReport
+
+
+class TotalsReportSuccessResponse(BaseSuccessResponse):
+    results: TotalsReport
+
+
+# Each expression maps a DATE column to the first day of its bucket, so the
+# GROUP BY still walks the (user_id, <date>) index in order.
+bucket_expressions = {
+    ReportGranularity.DAY: "{col}",
+    ReportGranularity.WEEK: "DATE_SUB({col}, INTERVAL WEEKDAY({col}) DAY)",
+    ReportGranularity.MONTH: "DATE_SUB({col}, INTERVAL DAYOFMONTH({col}) - 1 DAY)",
+    ReportGranularity.YEAR: "MAKEDATE(YEAR({col}), 1)",
+}
+
+bucket_column_names = [
+    "source",
+    "period_start",
+    "total",
+    "count",
+    "min",
+    "max",
+    "average",
+]
+
+
+def summary_query(granularity: ReportGranularity):
+    def select(source, table, date_column):
+        bucket = bucket_expressions[granularity].format(col=date_column)
+        return (
+            f"SELECT {source} AS source, {bucket} AS period_start, "
+            "SUM(amount), COUNT(*), MIN(amount), MAX(amount), ROUND(AVG(amount), 2) "
+            f"FROM {table} WHERE user_id = %s AND {date_column} BETWEEN %s AND %s "
+            "GROUP BY source, period_start"
+        )
+
+    return (
+        " UNION ALL ".join(
+            [
+                select("'income'", "income", "income_date"),
+                select("'expenses'", "expenses", "expense_date"),
+                select(
+                    "CONCAT('transactions.', type)",
+                    "transactions",
+                    "transaction_date",
+                ),
+            ]
+        )
+        + " ORDER BY source, period_start"
+    )
+
+
+def add_bucket(report, source: str, bucket):
+    if source == "income":
+        report.income.append(bucket)
+    elif source == "expenses":
+        report.expenses.append(bucket)
+    else:
+        getattr(report.transactions, source.split(".")[1]).append(bucket)
+
+
+@router.get(
+    "/summary",
+    responses={
+        200: {"model": SummaryReportSuccessResponse},
+        401: {"model": BaseErrorResponse},
+        422: {"model": BaseErrorResponse},
+        500: {"model": BaseErrorResponse},
+    },
+)
+async def get_summary(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    granularity: ReportGranularity = Query(ReportGranularity.MONTH),
+    db: Session = Depends(get_read_session),
+):
+    try:
+        vuser: User = request.state.user
+        if not vuser:
+            return auth_error_response()
+
+        if end_date < start_date:
+            return validation_error_response("end_date must not be before start_date")
+
+        rows = await db.fetchall(
+            summary_query(granularity),
+            (vuser.user_id, start_date, end_date) * 3,
+        )
+
+        report = SummaryReport(
+            granularity=granularity, start_date=start_date, end_date=end_date
+        )
+        for row in rows:
+            bucket = dict(zip(bucket_column_names, row))
+            add_bucket(report, bucket.pop("source"), ReportBucket(**bucket))
+
+        return ModelResponse(
+            status_code=200,
+            content=SummaryReportSuccessResponse(
+                success=True, message="Summary report generated", results=report
+            ),
+        )
+    except MYSQLError as e:
+        logger.error(f"MySQL error: {e}")
+        return error_response(e)
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return error_response(e)
+
+
+@router.get(
+    "/totals",
+    responses={
+        200: {"model": TotalsReportSuccessResponse},
+        401: {"model": BaseErrorResponse},
+        422: {"model": BaseErrorResponse},
+        500: {"model": BaseErrorResponse},
+    },
+)
+async def get_totals(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    granularity: ReportGranularity = Query(ReportGranularity.MONTH),
+    db: Session = Depends(get_read_session),
+):
+    # Served from the user_period_totals rollup, which only stores whole
+    # months, so the range must be made of whole months too.
+    # /reports/summary remains the exact (row-scanning) variant.
+    try:
+        vuser: User = request.state.user
+        if not vuser:
+            return auth_error_response()
+
+        if end_date < start_date:
+            return validation_error_response("end_date must not be before start_date")
+
+        if start_date.day != 1 or end_date.day != month_length(end_date):
+            return validation_error_response(
+                "Totals are kept per month: start_date must be the first and "
+                "end_date the last day of a month; use /reports/summary for "
+                "other ranges"
+            )
+
+        if granularity not in (ReportGranularity.MONTH, ReportGranularity.YEAR):
+            return validation_error_response(
+                "Totals are kept per month; use /reports/summary for day or week buckets"
+            )
+
+        bucket = bucket_expressions[granularity].format(col="period")
+        rows = await db.fetchall(
+            f"SELECT kind, {bucket} AS period_start, SUM(total), SUM(count) "
+            "FROM user_period_totals WHERE user_id = %s AND period BETWEEN %s AND %s "
+            "GROUP BY kind, period_start HAVING SUM(count) > 0 "
+            "ORDER BY kind, period_start",
+            (vuser.user_id, start_date, end_date),
+        )
+
+        report = TotalsReport(
+            granularity=granularity, start_date=start_date, end_date=end_date
+        )
+        for kind, period_start, total, count in rows:
+            average = (Decimal(total) / count).quantize(Decimal("0.01"))
+            add_bucket(
+                report,
+                kind,
+                PeriodTotal(
+                    period_start=period_start,
+                    total=total,
+                    count=count,
+                    average=average,
+                ),
+            )
+
+        return ModelResponse(
+            status_code=200,
+            content=TotalsReportSuccessResponse(
+                success=True, message="Totals report generated", results=report
+            ),
+        )
+    except MYSQLError as e:
+        logger.error(f"MySQL error: {e}")
+        return error_response(e)
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return error_response(e)
+
+
+def month_length(day: date) -> int:
+    return monthrange(day.year, day.month)[1]
@@ -0,0 +1,155 @@
+from fastapi import APIRouter, Request, Query, Depends
+from mysql.connector import Error as MYSQLError
+from re import findall
+from typing import Optional
+from schemas import (
+    User,
+    BaseSuccessResponse,
+    BaseErrorResponse,
+    SearchHit,
+    SearchSource,
+)
+from db.session import Session, get_read_session
+from utils.logger import logger
+from utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursorError,
+    pack_cursor,
+    unpack_cursor,
+)
+from utils.responses import (
+    ModelResponse,
+    auth_error_response,
+    error_response,
+    validation_error_response,
+)
+
+router = APIRouter(prefix="/search")
+
+MAX_SEARCH_TERMS = 8
+
+
+class SearchSuccessResponse(BaseSuccessResponse):
+    results: list[SearchHit]
+    next_cursor: Optional[str] = None
+
+
+search_column_names = list(SearchHit.model_fields)
+
+
+def boolean_query(q: str) -> str:
+    # Every word is required and matched as a prefix, so "groc sup" finds
+    # "Grocery supplies". Boolean operators typed by the user are dropped.
+    return " ".join(f"+{term}*" for term in findall(r"\w+", q)[:MAX_SEARCH_TERMS])
+
+
+def search_query(after: bool) -> str:
+    match = "MATCH(description) AGAINST (%s IN BOOLEAN MODE)"
+
+    def select(source, table, pk, date_column, type_column):
+        return (
+            f"SELECT '{source.value}' AS source, {pk} AS id, amount, description, "
+            f"{date_column} AS entry_date, {type_column} AS type, {match} AS score "
+            f"FROM {table} WHERE user_id = %s AND {match}"
+        )
+
+    sql = (
+        "WITH hits AS ("
+        + " UNION ALL ".join(
+            [
+                select(
+                    SearchSource.INCOME, "income", "income_id", "income_date", "NULL"
+                ),
+                select(
+                    SearchSource.EXPENSES,
+                    "expenses",
+                    "expense_id",
+                    "expense_date",
+                    "NULL",
+                ),
+                select(
+                    SearchSource.TRANSACTIONS,
+                    "transactions",
+                    "transaction_id",
+                    "transaction_date",
+                    "type",
+                ),
+            ]
+        )
+        + ") SELECT hits.* FROM hits"
+    )
+    if after:
+        # The cursor names the last row sent, whose score is recomputed here
+        # rather than compared to the float it sent, which need not survive
+        # the round trip exactly. Only if that row is gone is the sent score
+        # used instead.
+        sql += (
+            ", (SELECT COALESCE((SELECT score FROM hits WHERE source = %s AND id = %s),"
+            " %s) AS score) AS anchor"
+            " WHERE hits.score < anchor.score OR (hits.score = anchor.score AND"
+            " (hits.source > %s OR (hits.source = %s AND hits.id < %s)))"
+        )
+    return sql + " ORDER BY hits.score DESC, hits.source, hits.id DESC LIMIT %s"
+
+
+@router.get(
+    "",
+    responses={
+        200: {"model": SearchSuccessResponse},
+        401: {"model": BaseErrorResponse},
+        422: {"model": BaseErrorResponse},
+        500: {"model": BaseErrorResponse},
+    },
+)
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_session),
+):
+    # Ranked by FULLTEXT relevance across income, expenses and transactions.
+    # The FULLTEXT indexes cover every user's rows: MATCH finds all users'
+    # matches and the user predicate filters them afterwards, so a term that
+    # is common across users costs its matches in everyone's ledger.
+    try:
+        vuser: User = request.state.user
+        if not vuser:
+            return auth_error_response()
+
+        terms = boolean_query(q)
+        if not terms:
+            return validation_error_response("q must contain at least one word")
+
+        params = (terms, vuser.user_id, terms) * 3
+        if cursor:
+            score, source, row_id = unpack_cursor(cursor, float, str, int)
+            params += (source, row_id, score, source, source, row_id)
+        rows = await db.fetchall(search_query(bool(cursor)), params + (limit + 1,))
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = dict(zip(search_column_names, rows[-1]))
+            next_cursor = pack_cursor([last["score"], last["source"], last["id"]])
+
+        return ModelResponse(
+            status_code=200,
+            content=SearchSuccessResponse(
+                success=True,
+                message=f"{len(rows)} results found",
+                results=[
+                    SearchHit(**dict(zip(search_column_names, row))) for row in rows
+                ],
+                next_cursor=next_cursor,
+            ),
+        )
+    except InvalidCursorError as e:
+        return validation_error_response(str(e))
+    except MYSQLError as e:
+        logger.error(f"MySQL error: {e}")
+        return error_response(e)
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return error_response(e)
@@ -0,0 +1,182 @@
+from fastapi import APIRouter, Request, Query, Depends
+from pydantic import create_model
+from mysql.connector import Error as MYSQLError
+from datetime import datetime
+from typing import Optional
+from schemas import User, BaseSuccessResponse, BaseErrorResponse
+from db.session import Session, get_user_session
+from db.tombstones import retention_horizon
+from db.versions import CHANGES, current_version
+from routes.income import resource as income
+from routes.expense import resource as expense
+from routes.transaction import resource as transaction
+from routes.budget import resource as budget
+from routes.savings_goals import resource as savings_goal
+from utils.logger import logger
+from utils.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursorError,
+    pack_cursor,
+    unpack_cursor,
+)
+from utils.responses import (
+    ModelResponse,
+    auth_error_response,
+    error_response,
+    validation_error_response,
+)
+
+SYNC_RESOURCES = [income, expense, transaction, budget, savings_goal]
+
+router = APIRouter(prefix="/sync")
+
+ChangesModels = {
+    r.table: create_model(
+        f"{r.model.__name__}Changes",
+        upserts=(list[r.model], []),
+        deletes=(list[int], []),
+    )
+    for r in SYNC_RESOURCES
+}
+
+SyncResults = create_model(
+    "SyncResults", **{table: (model, ...) for table, model in ChangesModels.items()}
+)
+
+
+class SyncSuccessResponse(BaseSuccessResponse):
+    results: SyncResults
+    next_token: str
+    reset: bool = False
+    has_more: bool = False
+
+
+@router.get(
+    "",
+    responses={
+        200: {"model": SyncSuccessResponse},
+        401: {"model": BaseErrorResponse},
+        422: {"model": BaseErrorResponse},
+        500: {"model": BaseErrorResponse},
+    },
+)
+async def sync(
+    request: Request,
+    since: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    # Always the primary (or the user's shard): a lagging replica could show
+    # a change number before the smaller ones, which would then be skipped.
+    db: Session = Depends(get_user_session),
+):
+    # Every write stamps its rows, or its tombstones, with the user's next
+    # change number (see db.versions.next_change), and changes are sent in
+    # (change number, resource, row id) order, at most ``limit`` per call.
+    # The token holds the position of the last change sent, so the next
+    # call resumes right after it. Without a token, or with one older than
+    # the tombstone retention, the client gets every row and reset=True, and
+    # must replace its local copy; has_more says to call again at once.
+    try:
+        vuser: User = request.state.user
+        if not vuser:
+            return auth_error_response()
+
+        now = await db.now()
+        position = None
+        if since:
+            try:
+                change_seq, index, row_id, floor, issued = unpack_cursor(
+                    since, int, int, int, int, str
+                )
+                issued_at = datetime.fromisoformat(issued)
+            except ValueError:
+                raise InvalidCursorError(f"Invalid sync token: {since}")
+            if issued_at >= retention_horizon(now):
+                position = (change_seq, index, row_id)
+
+        reset = position is None
+        if reset:
+            # Deletions numbered up to the current change came before the
+            # rows this full sync sends, so their tombstones are skipped.
+            position, issued_at = (-1, 0, 0), now
+            floor = await current_version(db, CHANGES, vuser.user_id)
+
+        changes = []
+        for index, r in enumerate(SYNC_RESOURCES):
+            after, params = after_position(index, position, r.pk)
+            rows = await db.fetchall(
+                f"SELECT {r.column_list}, change_seq FROM {r.table} "
+                f"WHERE user_id = %s AND {after} ORDER BY change_seq, {r.pk} LIMIT %s",
+                (vuser.user_id, *params, limit + 1),
+            )
+            pk_index = r.columns.index(r.pk)
+            changes += [(row[-1], index, row[pk_index], row[:-1]) for row in rows]
+
+            after, params = after_position(index, position, "row_id")
+            deleted = await db.fetchall(
+                "SELECT change_seq, row_id FROM deleted_rows "
+                f"WHERE user_id = %s AND resource = %s AND change_seq > %s AND {after} "
+                "ORDER BY change_seq, row_id LIMIT %s",
+                (vuser.user_id, r.table, floor, *params, limit + 1),
+            )
+            changes += [
+                (change_seq, index, row_id, None) for change_seq, row_id in deleted
+            ]
+
+        # Each source was read one past the limit, so whether any change
+        # was left out shows in the merged count.
+        changes.sort(key=lambda change: change[:3])
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        results = {
+            r.table: ChangesModels[r.table].model_construct(upserts=[], deletes=[])
+            for r in SYNC_RESOURCES
+        }
+        for change_seq, index, row_id, row in changes:
+            r = SYNC_RESOURCES[index]
+            if row is None:
+                results[r.table].deletes.append(row_id)
+            else:
+                results[r.table].upserts.append(r.to_model(row))
+
+        if changes:
+            position = changes[-1][:3]
+        # Deletions not sent yet may be as old as the start of this run of
+        # calls, and their tombstones must outlive the token until it ends.
+        if not has_more:
+            issued_at = now
+        next_token = pack_cursor([*position, floor, issued_at.isoformat()])
+        return ModelResponse(
+            status_code=200,
+            content=SyncSuccessResponse.model_construct(
+                success=True,
+                message="Changes fetched successfully",
+                results=SyncResults.model_construct(**results),
+                next_token=next_token,
+                reset=reset,
+                has_more=has_more,
+            ),
+        )
+    except InvalidCursorError as e:
+        return validation_error_response(str(e))
+    except MYSQLError as e:
+        logger.error(f"MySQL error: {e}")
+        return error_response(e)
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return error_response(e)
+
+
+def after_position(index: int, position, id_column: str) -> tuple:
+    """Predicate selecting the changes of the ``index``-th resource that
+    come after ``position``, a (change_seq, resource index, id) triple."""
+    change_seq, position_index, row_id = position
+    if index < position_index:
+        return "change_seq > %s", (change_seq,)
+    if index > position_index:
+        return "change_seq >= %s", (change_seq,)
+    return (
+        f"(change_seq > %s OR (change_seq = %s AND {id_column} > %s))",
+        (change_seq, change_seq, row_id),
+    )
@@ -1,9 +1,28 @@
-from datetime import date, datetime, UTC
-from typing import Optional
+from datetime import date, datetime
+from typing import Annotated, Optional, Union
 from decimal import Decimal
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import AfterValidator, BaseModel, EmailStr, Field, PlainSerializer
 from enum import Enum
 
+CENTS = Decimal("0.01")
+
+
+def _decimal_number(value: Decimal) -> Union[int, float]:
+    # Amounts go over the wire as JSON numbers, exactly as jsonable_encoder
+    # used to render them, now also when serializing with model_dump_json.
+    return int(value) if value.as_tuple().exponent >= 0 else float(value)
+
+
+Amount = Annotated[Decimal, PlainSerializer(_decimal_number, when_used="json")]
+# Amounts written to a DECIMAL(10, 2) column. More decimals are rejected, not
+# rounded by the database, and the rest are padded to two places, as read
+# back, so a write's response and rollups match later reads.
+ColumnAmount = Annotated[
+    Amount,
+    Field(max_digits=10, decimal_places=2),
+    AfterValidator(lambda value: value.quantize(CENTS)),
+]
+
 
 # Base models for responses
 class BaseSuccessResponse(BaseModel):
@@ -49,24 +68,26 @@ class UpdateUser(BaseUserModel):
 class BaseIncomeModel(BaseModel):
     income_id: Optional[int]
     user_id: Optional[int]
-    amount: Optional[Decimal]
+    amount: Optional[Amount]
     description: Optional[str]
     income_date: Optional[date]
     created_at: Optional[datetime]
+    updated_at: Optional[datetime]
 
 
 class Income(BaseIncomeModel):
     income_id: int
     user_id: int
-    amount: Decimal
+    amount: Amount
     description: Optional[str]
     income_date: date
     created_at: datetime
+    updated_at: datetime
 
 
 class CreateIncome(BaseModel):
     user_id: int
-    amount: Decimal
+    amount: ColumnAmount
     description: Optional[str]
     income_date: date
 
@@ -74,7 +95,7 @@ class CreateIncome(BaseModel):
 class UpdateIncome(BaseModel):
     income_id: int
     user_id: Optional[int] = None
-    amount: Optional[Decimal] = None
+    amount: Optional[ColumnAmount] = None
     description: Optional[str] = None
     income_date: Optional[date] = None
 
@@ -83,24 +104,26 @@ class UpdateIncome(BaseModel):
 class BaseExpenseModel(BaseModel):
     expense_id: Optional[int]
     user_id: Optional[int]
-    amount: Optional[Decimal]
+    amount: Optional[Amount]
     description: Optional[str]
     expense_date: Optional[date]
     created_at: Optional[datetime]
+    updated_at: Optional[datetime]
 
 
 class Expense(BaseExpenseModel):
     expense_id: int
     user_id: int
-    amount: Decimal
+    amount: Amount
     description: Optional[str]
     expense_date: date
     created_at: datetime
+    updated_at: datetime
 
 
 class CreateExpense(BaseModel):
     user_id: int
-    amount: Decimal
+    amount: ColumnAmount
     description: Optional[str]
     expense_date: date
 
@@ -108,7 +131,7 @@ class CreateExpense(BaseModel):
 class UpdateExpense(BaseModel):
     expense_id: int
     user_id: Optional[int] = None
-    amount: Optional[Decimal] = None
+    amount: Optional[ColumnAmount] = None
     description: Optional[str] = None
     expense_date: Optional[date] = None
 
@@ -120,7 +143,7 @@ class TransactionType(str, Enum):
 
 
 class BaseTransactionModel(BaseModel):
-    amount: Decimal = Field(..., gt=0, decimal_places=2)
+    amount: Amount = Field(..., gt=0, decimal_places=2)
     description: Optional[str] = Field(default=None, max_length=255)
     transaction_date: date
 
@@ -128,25 +151,27 @@ class BaseTransactionModel(BaseModel):
 class BaseTransactionModel(BaseModel):
     transaction_id: Optional[int]
     user_id: Optional[int]
-    amount: Optional[Decimal]
+    amount: Optional[Amount]
     description: Optional[str]
     transaction_date: Optional[date]
     type: Optional[TransactionType]
     created_at: Optional[datetime]
+    updated_at: Optional[datetime]
 
 
 class Transaction(BaseTransactionModel):
     transaction_id: int
     user_id: int
-    amount: Decimal
+    amount: Amount
     transaction_date: date
     type: TransactionType
     created_at: datetime
+    updated_at: datetime
 
 
 class CreateTransaction(BaseModel):
     user_id: int
-    amount: Decimal
+    amount: ColumnAmount
     description: Optional[str]
     transaction_date: date
     type: TransactionType
@@ -155,7 +180,7 @@ class CreateTransaction(BaseModel):
 class UpdateTransaction(BaseModel):
     transaction_id: int
     user_id: Optional[int] = None
-    amount: Optional[Decimal] = None
+    amount: Optional[ColumnAmount] = None
     description: Optional[str] = None
     transaction_date: Optional[date] = None
     type: Optional[TransactionType] = None
@@ -165,24 +190,34 @@ class UpdateTransaction(BaseModel):
 class BaseBudgetModel(BaseModel):
     budget_id: Optional[int]
     user_id: Optional[int]
-    amount: Optional[Decimal]
+    amount: Optional[Amount]
     start_date: Optional[date]
     end_date: Optional[date]
     created_at: Optional[datetime]
+    updated_at: Optional[datetime]
 
 
 class Budget(BaseBudgetModel):
     budget_id: int
     user_id: int
-    amount: Decimal
+    amount: Amount
     start_date: date
     end_date: date
     created_at: datetime
+    updated_at: datetime
+
+
+class BudgetUtilization(Budget):
+    spent: Amount
+    remaining: Amount
+    percent_used: Optional[Amount]
+    days_elapsed: int
+    burn_rate: Amount
 
 
 class CreateBudget(BaseModel):
     user_id: int
-    amount: Decimal
+    amount: ColumnAmount
     start_date: date
     end_date: date
 
@@ -190,7 +225,7 @@ class CreateBudget(BaseModel):
 class UpdateBudget(BaseModel):
     budget_id: int
     user_id: Optional[int] = None
-    amount: Optional[Decimal] = None
+    amount: Optional[ColumnAmount] = None
     start_date: Optional[date] = None
     end_date: Optional[date] = None
 
@@ -200,8 +235,8 @@ class BaseSavingsGoalModel(BaseModel):
     goal_id: Optional[int]
     user_id: Optional[int]
     name: Optional[str]
-    target_amount: Optional[Decimal]
-    current_amount: Optional[Decimal]
+    target_amount: Optional[Amount]
+    current_amount: Optional[Amount]
     target_date: Optional[date]
     created_at: Optional[datetime]
     updated_at: Optional[datetime]
@@ -211,8 +246,8 @@ class SavingsGoal(BaseSavingsGoalModel):
     goal_id: int
     user_id: int
     name: str
-    target_amount: Decimal
-    current_amount: Decimal
+    target_amount: Amount
+    current_amount: Amount
     target_date: Optional[date]
     created_at: datetime
     updated_at: datetime
@@ -221,8 +256,8 @@ class SavingsGoal(BaseSavingsGoalModel):
 class CreateSavingsGoal(BaseModel):
     user_id: int
     name: str
-    target_amount: Decimal
-    current_amount: Optional[Decimal] = 0.00
+    target_amount: ColumnAmount
+    current_amount: Optional[ColumnAmount] = Decimal("0.00")
     target_date: date
 
 
@@ -230,6 +265,82 @@ class UpdateSavingsGoal(BaseModel):
     goal_id: int
     user_id: Optional[int] = None
     name: Optional[str] = None
-    target_amount: Optional[Decimal] = None
-    current_amount: Optional[Decimal] = None
+    target_amount: Optional[ColumnAmount] = None
+    current_amount: Optional[ColumnAmount] = None
     target_date: Optional[date] = None
+
+
+# Export models
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+# Report models
+class ReportGranularity(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+    YEAR = "year"
+
+
+class PeriodTotal(BaseModel):
+    period_start: date
+    total: Amount
+    count: int
+    average: Amount
+
+
+class ReportBucket(PeriodTotal):
+    min: Amount
+    max: Amount
+
+
+class TransactionsSummary(BaseModel):
+    income: list[ReportBucket] = []
+    expense: list[ReportBucket] = []
+
+
+class SummaryReport(BaseModel):
+    granularity: ReportGranularity
+    start_date: date
+    end_date: date
+    income: list[ReportBucket] = []
+    expenses: list[ReportBucket] = []
+    transactions: TransactionsSummary = TransactionsSummary()
+
+
+class TransactionsTotals(BaseModel):
+    income: list[PeriodTotal] = []
+    expense: list[PeriodTotal] = []
+
+
+class TotalsReport(BaseModel):
+    granularity: ReportGranularity
+    start_date: date
+    end_date: date
+    income: list[PeriodTotal] = []
+    expenses: list[PeriodTotal] = []
+    transactions: TransactionsTotals = TransactionsTotals()
+
+
+# Search models
+class SearchSource(str, Enum):
+    INCOME = "income"
+    EXPENSES = "expenses"
+    TRANSACTIONS = "transactions"
+
+
+class SearchHit(BaseModel):
+    source: SearchSource
+    id: int
+    amount: Amount
+    description: Optional[str]
+    entry_date: date
+    type: Optional[TransactionType] = None
+    score: float
+
+
+# Write models
+class ReturnPreference(str, Enum):
+    REPRESENTATION = "representation"
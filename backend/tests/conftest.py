@@ -0,0 +1,210 @@
+"""Shared fixtures: the app running on an in-memory SQLite database.
+
+`SqliteSession` runs the routes' own SQL after rewriting the few MySQL-only
+constructs they use, so route tests go through the real statements and
+transaction boundaries without a MySQL server.
+"""
+
+import re
+import sqlite3
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from decimal import Decimal
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+import db.session
+import middleware.jwt_auth
+import utils.export
+from db.session import ExecResult, Session
+from utils.user_cache import user_cache
+
+JWT_SECRET_KEY = "test-secret-" * 4
+
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("DEC", lambda raw: Decimal(raw.decode()))
+sqlite3.register_converter("DATE", lambda raw: date.fromisoformat(raw.decode()))
+sqlite3.register_converter(
+    "TIMESTAMP", lambda raw: datetime.fromisoformat(raw.decode())
+)
+
+SCHEMA = """
+CREATE TABLE users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT, username UNIQUE, email UNIQUE,
+    password_hash, created_at TIMESTAMP, updated_at TIMESTAMP
+);
+CREATE TABLE income (
+    income_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id, amount DEC,
+    description, income_date DATE, created_at TIMESTAMP, updated_at TIMESTAMP,
+    change_seq INT NOT NULL DEFAULT 0
+);
+CREATE TABLE expenses (
+    expense_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id, amount DEC,
+    description, expense_date DATE, created_at TIMESTAMP, updated_at TIMESTAMP,
+    change_seq INT NOT NULL DEFAULT 0
+);
+CREATE TABLE transactions (
+    transaction_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id, amount DEC,
+    description, transaction_date DATE, type, created_at TIMESTAMP,
+    updated_at TIMESTAMP, change_seq INT NOT NULL DEFAULT 0
+);
+CREATE TABLE budgets (
+    budget_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id, amount DEC,
+    start_date DATE, end_date DATE, created_at TIMESTAMP, updated_at TIMESTAMP,
+    change_seq INT NOT NULL DEFAULT 0
+);
+CREATE TABLE savings_goals (
+    goal_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id, name,
+    target_amount DEC, current_amount DEC, target_date DATE,
+    created_at TIMESTAMP, updated_at TIMESTAMP, change_seq INT NOT NULL DEFAULT 0
+);
+CREATE TABLE user_versions (
+    user_id, resource, version, PRIMARY KEY (user_id, resource)
+);
+CREATE TABLE deleted_rows (
+    user_id, resource, row_id, deleted_at TIMESTAMP, change_seq,
+    PRIMARY KEY (user_id, resource, row_id)
+);
+CREATE TABLE user_period_totals (
+    user_id, kind, period DATE, total DEC, count,
+    PRIMARY KEY (user_id, kind, period)
+);
+"""
+
+# Server variables the code reads, as a MySQL server set up for it has them.
+SERVER_VARIABLES = {"auto_increment_increment": 1, "innodb_autoinc_lock_mode": 1}
+
+
+def to_sqlite(sql: str) -> str:
+    sql = " ".join(sql.replace("-- sql", "").split())
+    sql = sql.replace("%s", "?").replace(" FOR UPDATE", "")
+    sql = sql.replace("INSERT IGNORE", "INSERT OR IGNORE")
+    sql = sql.replace("ON DUPLICATE KEY UPDATE", "ON CONFLICT DO UPDATE SET")
+    sql = re.sub(r"\bVALUES\((\w+)\)", r"excluded.\1", sql)
+    # Typed, so it is read back as a datetime as MySQL's is.
+    sql = sql.replace(
+        "SELECT CURRENT_TIMESTAMP", 'SELECT CURRENT_TIMESTAMP AS "now [TIMESTAMP]"'
+    )
+    return re.sub(r"@@(\w+)", lambda match: str(SERVER_VARIABLES[match.group(1)]), sql)
+
+
+class SqliteSession(Session):
+    """A `Session` on a SQLite connection, standing in for a MySQL one."""
+
+    def __init__(self, conn):
+        super().__init__(None, conn)
+        self.queries = []
+        self._last_insert_id = None
+        conn.create_function("LAST_INSERT_ID", 1, self._set_last_insert_id)
+
+    def _set_last_insert_id(self, value):
+        self._last_insert_id = value
+        return value
+
+    async def _run(self, sql, params, fetch):
+        self.queries.append(sql)
+        self._last_insert_id = None
+        cursor = self.conn.execute(to_sqlite(sql), params)
+        if fetch == "one":
+            return cursor.fetchone()
+        if fetch == "all":
+            return cursor.fetchall()
+        lastrowid = cursor.lastrowid
+        if self._last_insert_id is not None:
+            lastrowid = self._last_insert_id
+        elif sql.lstrip().startswith("INSERT") and cursor.rowcount > 1:
+            # MySQL reports the first id of a multi-row insert, SQLite the last.
+            lastrowid -= cursor.rowcount - 1
+        return ExecResult(cursor.rowcount, lastrowid)
+
+    async def stream(self, sql, params=(), batch_size=1000):
+        cursor = self.conn.execute(to_sqlite(sql), params)
+        while rows := cursor.fetchmany(batch_size):
+            yield rows
+
+    async def _commit(self):
+        self.conn.commit()
+
+    async def _rollback(self):
+        self.conn.rollback()
+
+    async def _reconnect(self):
+        pass
+
+
+class Connection(sqlite3.Connection):
+    """Weakly referenceable, as the per-connection caches need."""
+
+
+@pytest.fixture
+def database():
+    conn = sqlite3.connect(
+        ":memory:",
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+        check_same_thread=False,
+        factory=Connection,
+    )
+    conn.executescript(SCHEMA)
+    now = datetime(2026, 1, 1)
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?, ?, '', ?, ?)",
+        [
+            (1, "alice", "alice@example.com", now, now),
+            (2, "bob", "bob@example.com", now, now),
+        ],
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def sessions(database, monkeypatch):
+    """Every session the app checks out, in order."""
+    opened = []
+
+    @asynccontextmanager
+    async def session_scope(**target):
+        session = SqliteSession(database)
+        session.target = target
+        session.frozen = target.get("frozen", False)
+        opened.append(session)
+        try:
+            yield session
+        finally:
+            # As the pool does on checkin.
+            database.rollback()
+
+    for module in (db.session, middleware.jwt_auth, utils.export):
+        monkeypatch.setattr(module, "session_scope", session_scope)
+    monkeypatch.setattr(middleware.jwt_auth, "JWT_SECRET_KEY", JWT_SECRET_KEY)
+    user_cache.clear()
+    return opened
+
+
+@pytest.fixture
+def client(sessions):
+    from main import app
+
+    return TestClient(app)
+
+
+def auth(user_id: int, username: str) -> dict:
+    token = jwt.encode(
+        {"user_id": user_id, "username": username},
+        JWT_SECRET_KEY,
+        algorithm="HS256",
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def alice():
+    return auth(1, "alice")
+
+
+@pytest.fixture
+def bob():
+    return auth(2, "bob")
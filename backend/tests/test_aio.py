@@ -0,0 +1,95 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from struct import pack
+from types import SimpleNamespace
+from pymysql.constants import FIELD_TYPE, FLAG
+from db.aio import decode_row
+
+BINARY = 63
+UTF8MB4 = 45
+
+
+def field(type_code, flags=0, charsetnr=UTF8MB4):
+    return SimpleNamespace(type_code=type_code, flags=flags, charsetnr=charsetnr)
+
+
+def row(*values):
+    """A binary protocol row of (field, payload) pairs; a None payload is NULL."""
+    bitmap = bytearray((len(values) + 9) // 8)
+    payload = b""
+    for i, (_, data) in enumerate(values):
+        if data is None:
+            bitmap[(i + 2) // 8] |= 1 << (i + 2) % 8
+        else:
+            payload += data
+    fields = [f for f, _ in values]
+    return decode_row(b"\x00" + bytes(bitmap) + payload, fields, "utf8")
+
+
+def lenenc(data: bytes) -> bytes:
+    if len(data) < 0xFB:
+        return bytes([len(data)]) + data
+    return b"\xfc" + pack("<H", len(data)) + data
+
+
+def test_null_bitmap_spans_bytes():
+    values = [(field(FIELD_TYPE.LONG), pack("<i", i)) for i in range(9)]
+    values[1] = (field(FIELD_TYPE.LONG), None)
+    values[6] = (field(FIELD_TYPE.LONG), None)  # first bit of the second byte
+    assert row(*values) == (0, None, 2, 3, 4, 5, None, 7, 8)
+
+
+def test_signed_and_unsigned_integers():
+    assert row(
+        (field(FIELD_TYPE.TINY), b"\xff"),
+        (field(FIELD_TYPE.TINY, FLAG.UNSIGNED), b"\xff"),
+        (field(FIELD_TYPE.SHORT), pack("<h", -2)),
+        (field(FIELD_TYPE.LONG, FLAG.UNSIGNED), pack("<I", 2**32 - 1)),
+        (field(FIELD_TYPE.LONGLONG), pack("<q", -(2**63))),
+        (field(FIELD_TYPE.LONGLONG, FLAG.UNSIGNED), pack("<Q", 2**64 - 1)),
+        (field(FIELD_TYPE.DOUBLE), pack("<d", 1.5)),
+    ) == (-1, 255, -2, 2**32 - 1, -(2**63), 2**64 - 1, 1.5)
+
+
+def test_dates_and_datetimes():
+    assert row(
+        (field(FIELD_TYPE.DATE), b"\x04" + pack("<HBB", 2026, 1, 31)),
+        (
+            field(FIELD_TYPE.DATETIME),
+            b"\x07" + pack("<HBBBBB", 2026, 1, 31, 23, 59, 58),
+        ),
+        (
+            field(FIELD_TYPE.TIMESTAMP),
+            b"\x0b" + pack("<HBBBBBI", 2026, 1, 31, 23, 59, 58, 123456),
+        ),
+        (field(FIELD_TYPE.DATETIME), b"\x00"),
+    ) == (
+        date(2026, 1, 31),
+        datetime(2026, 1, 31, 23, 59, 58),
+        datetime(2026, 1, 31, 23, 59, 58, 123456),
+        None,
+    )
+
+
+def test_times():
+    assert row(
+        (field(FIELD_TYPE.TIME), b"\x08" + pack("<BIBBB", 0, 0, 1, 2, 3)),
+        (field(FIELD_TYPE.TIME), b"\x0c" + pack("<BIBBBI", 1, 2, 3, 4, 5, 6)),
+        (field(FIELD_TYPE.TIME), b"\x00"),
+        (field(FIELD_TYPE.LONG), pack("<i", 7)),
+    ) == (
+        timedelta(hours=1, minutes=2, seconds=3),
+        -timedelta(days=2, hours=3, minutes=4, seconds=5, microseconds=6),
+        timedelta(),
+        7,
+    )
+
+
+def test_decimals_strings_and_blobs():
+    blob = bytes(range(256)) + b"\x00" * 44
+    assert row(
+        (field(FIELD_TYPE.NEWDECIMAL), lenenc(b"-12.50")),
+        (field(FIELD_TYPE.VAR_STRING), lenenc("héllo".encode())),
+        (field(FIELD_TYPE.BLOB, charsetnr=BINARY), lenenc(blob)),
+        (field(FIELD_TYPE.LONG), pack("<i", 1)),
+    ) == (Decimal("-12.50"), "héllo", blob, 1)
@@ -0,0 +1,45 @@
+from asyncio import run
+from db.bulk import insert_many
+from db.session import ExecResult
+
+
+class FakeSession:
+    """Hands out auto-increment ids the way a server with these settings would."""
+
+    def __init__(self, increment, next_id, lock_mode=1):
+        self.conn = object.__new__(type("Connection", (), {}))
+        self.increment = increment
+        self.lock_mode = lock_mode
+        self.next_id = next_id
+        self.queries = []
+
+    async def fetchone(self, sql, params=()):
+        self.queries.append(sql)
+        return (self.increment, self.lock_mode)
+
+    async def execute(self, sql, params=()):
+        self.queries.append(sql)
+        rows = sql.count("(%s, %s)")
+        first, self.next_id = self.next_id, self.next_id + rows * self.increment
+        return ExecResult(rows, first)
+
+
+def test_ids_step_by_auto_increment_increment():
+    db = FakeSession(increment=3, next_id=2)
+    ids = run(insert_many(db, "t", ["a", "b"], [(1, 2)] * 5, chunk_size=2))
+    assert ids == [2, 5, 8, 11, 14]
+    # The settings are read once per connection.
+    assert sum(sql.startswith("SELECT") for sql in db.queries) == 1
+    run(insert_many(db, "t", ["a", "b"], [(1, 2)], chunk_size=2))
+    assert sum(sql.startswith("SELECT") for sql in db.queries) == 1
+
+
+def test_consecutive_ids_by_default():
+    db = FakeSession(increment=1, next_id=7)
+    assert run(insert_many(db, "t", ["a", "b"], [(1, 2)] * 3)) == [7, 8, 9]
+
+
+def test_one_row_per_insert_when_ids_may_interleave():
+    db = FakeSession(increment=1, next_id=7, lock_mode=2)
+    assert run(insert_many(db, "t", ["a", "b"], [(1, 2)] * 3)) == [7, 8, 9]
+    assert [sql.count("(%s, %s)") for sql in db.queries[1:]] == [1, 1, 1]
@@ -0,0 +1,103 @@
+from decimal import Decimal
+import pytest
+
+
+def income(**fields):
+    return {
+        "user_id": 1,
+        "amount": "10.00",
+        "description": "Salary",
+        "income_date": "2026-01-05",
+        **fields,
+    }
+
+
+def owners(database, table="income", pk="income_id"):
+    return dict(database.execute(f"SELECT {pk}, user_id FROM {table}").fetchall())
+
+
+def versions(database):
+    return {
+        (user_id, resource): version
+        for user_id, resource, version in database.execute(
+            "SELECT * FROM user_versions"
+        )
+    }
+
+
+def test_create_belongs_to_the_caller(client, database, alice):
+    response = client.post("/income/post_income", json=income(user_id=2), headers=alice)
+
+    assert response.status_code == 200
+    assert response.json()["results"]["user_id"] == 1
+    assert owners(database) == {1: 1}
+    assert {user_id for user_id, _ in versions(database)} == {1}
+    totals = database.execute("SELECT user_id, total FROM user_period_totals")
+    assert totals.fetchall() == [(1, Decimal("10.00"))]
+
+
+def test_bulk_create_belongs_to_the_caller(client, database, alice):
+    response = client.post(
+        "/income/post_incomes",
+        json=[income(user_id=2), income(user_id=1), income(user_id=3)],
+        headers=alice,
+    )
+
+    assert response.status_code == 200
+    assert owners(database) == {1: 1, 2: 1, 3: 1}
+
+
+@pytest.mark.parametrize("path", ["/income/put_income", "/income/put_incomes"])
+def test_update_cannot_change_the_owner(client, database, alice, path):
+    client.post("/income/post_income", json=income(), headers=alice)
+    patch = {"income_id": 1, "user_id": 2, "amount": "12.00"}
+    body = patch if path.endswith("income") else [patch]
+
+    response = client.put(path, json=body, headers=alice)
+
+    assert response.status_code == 200
+    assert owners(database) == {1: 1}
+    assert database.execute("SELECT amount FROM income").fetchone() == (
+        Decimal("12.00"),
+    )
+    assert {user_id for user_id, _ in versions(database)} == {1}
+
+
+def test_update_of_the_owner_alone_changes_nothing(client, database, alice):
+    client.post("/income/post_income", json=income(), headers=alice)
+
+    response = client.put(
+        "/income/put_income", json={"income_id": 1, "user_id": 2}, headers=alice
+    )
+
+    assert response.status_code == 422
+    assert owners(database) == {1: 1}
+
+
+def test_rows_of_other_users_are_not_found(client, database, alice, bob):
+    client.post("/income/post_income", json=income(), headers=alice)
+
+    assert client.get("/income/get_income/1", headers=bob).status_code == 404
+    assert (
+        client.put(
+            "/income/put_income", json={"income_id": 1, "amount": "1.00"}, headers=bob
+        ).status_code
+        == 404
+    )
+    assert client.delete("/income/delete_income/1", headers=bob).status_code == 404
+    assert owners(database) == {1: 1}
+
+
+def test_rows_are_stamped_with_the_database_clock(client, database, sessions, alice):
+    # SQLite's CURRENT_TIMESTAMP is UTC; the app host's zone must not matter.
+    before = database.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+    response = client.post(
+        "/income/post_incomes", json=[income(), income()], headers=alice
+    )
+    after = database.execute("SELECT CURRENT_TIMESTAMP").fetchone()[0]
+
+    assert response.status_code == 200
+    stamps = database.execute("SELECT created_at, updated_at FROM income").fetchall()
+    (now,) = {value for row in stamps for value in row}
+    assert before <= now.isoformat(" ") <= after
+    assert sessions[-1].queries.count("SELECT CURRENT_TIMESTAMP") == 1
@@ -0,0 +1,134 @@
+from asyncio import run
+import pytest
+import db.replicas
+import db.session
+from db import db as sync_db
+from db.replicas import RecentWrites, Replica, ReplicaSet
+from db.session import get_replicas, recent_writes
+from utils.response_cache import LocalBackend, RedisBackend, response_cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(db.replicas, "monotonic", lambda: now[0])
+    return now
+
+
+def replica_set(balance="round_robin"):
+    return ReplicaSet(
+        [Replica(name, pool=None) for name in ("r1", "r2", "r3")],
+        balance,
+        retry_after=10,
+    )
+
+
+def names(replicas, picks=4):
+    return [replicas.pick().name for _ in range(picks)]
+
+
+def test_round_robin_takes_replicas_in_turn(clock):
+    assert names(replica_set()) == ["r1", "r2", "r3", "r1"]
+
+
+def test_least_connections_takes_the_least_busy(clock):
+    replicas = replica_set("least_connections")
+    replicas.replicas[0].in_use = 2
+    replicas.replicas[1].in_use = 1
+    assert names(replicas, 2) == ["r3", "r3"]
+    replicas.replicas[2].in_use = 1
+    # In turn among ties.
+    assert sorted(names(replicas, 2)) == ["r2", "r3"]
+
+
+def test_failed_replicas_are_skipped_until_retry_after(clock):
+    replicas = replica_set()
+    replicas.failed(replicas.replicas[1], ConnectionError("down"))
+    assert names(replicas) == ["r1", "r3", "r3", "r1"]
+
+    for replica in replicas.replicas:
+        replicas.failed(replica, ConnectionError("down"))
+    assert replicas.pick() is None
+
+    clock[0] += 10.5
+    assert replicas.pick() is not None
+
+
+def test_recent_writers_are_remembered_for_the_window():
+    writes = RecentWrites(LocalBackend(), window=5)
+    run(writes.mark(1))
+    assert run(writes.contains(1))
+    assert not run(writes.contains(2))
+
+    no_window = RecentWrites(LocalBackend(), window=0)
+    run(no_window.mark(1))
+    assert not run(no_window.contains(1))
+
+
+def test_everyone_is_a_recent_writer_while_the_backend_is_down():
+    class Down(LocalBackend):
+        async def get_many(self, keys):
+            raise ConnectionError("cache server down")
+
+    assert run(RecentWrites(Down(), window=5).contains(1))
+
+
+@pytest.fixture
+def replicated(monkeypatch):
+    monkeypatch.setattr(sync_db, "replica_urls", ["replica-1"])
+    monkeypatch.setattr(db.session, "_replicas", None)
+    monkeypatch.setattr(recent_writes, "backend", LocalBackend())
+
+
+def test_replicas_need_a_shared_marker_store(replicated):
+    with pytest.raises(ValueError, match="RESPONSE_CACHE_URL"):
+        get_replicas()
+
+    recent_writes.backend = RedisBackend("redis://cache")
+    assert [replica.name for replica in get_replicas().replicas] == ["replica-1:3306"]
+
+
+def income(**fields):
+    return {
+        "user_id": 1,
+        "amount": "10.00",
+        "description": "Salary",
+        "income_date": "2026-01-05",
+        **fields,
+    }
+
+
+def read_target(client, sessions, headers):
+    client.get("/income/get_all_incomes", headers=headers)
+    return sessions[-1].target
+
+
+def test_reads_stay_on_the_primary_after_a_write(
+    client, sessions, replicated, alice, bob
+):
+    assert read_target(client, sessions, alice) == {"replica": True}
+
+    client.post("/income/post_income", json=income(), headers=alice)
+
+    assert read_target(client, sessions, alice) == {"replica": False}
+    assert read_target(client, sessions, bob) == {"replica": True}
+
+
+def test_writers_are_marked_before_cached_reads_are_invalidated(
+    client, sessions, replicated, monkeypatch, alice
+):
+    events = []
+
+    async def mark(user_id):
+        events.append("mark")
+
+    async def invalidate(user_id, resource):
+        events.append("invalidate")
+
+    monkeypatch.setattr(recent_writes, "mark", mark)
+    monkeypatch.setattr(response_cache, "ttl", 60)
+    monkeypatch.setattr(response_cache, "invalidate", invalidate)
+
+    client.post("/income/post_income", json=income(), headers=alice)
+
+    assert events == ["mark", "invalidate"]
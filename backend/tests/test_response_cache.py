@@ -0,0 +1,128 @@
+from asyncio import run
+import pytest
+from fastapi import Request
+from fastapi.responses import Response
+from utils.response_cache import LocalBackend, ResponseCache, response_cache
+
+
+def request():
+    return Request({"type": "http", "method": "GET", "headers": []})
+
+
+def response(body: bytes):
+    return Response(body, media_type="application/json", headers={"etag": '"v1"'})
+
+
+def test_a_write_makes_every_entry_of_the_pair_stale():
+    cache = ResponseCache(LocalBackend(), ttl=60)
+
+    async def scenario():
+        for key in ("a", "b"):
+            _, generation = await cache.lookup(1, "income", key)
+            await cache.store(1, "income", key, generation, response(key.encode()))
+        await cache.store(2, "income", "a", b"0", response(b"bob"))
+        hits = [(await cache.lookup(1, "income", key))[0] for key in ("a", "b")]
+
+        await cache.invalidate(1, "income")
+        stale = [(await cache.lookup(1, "income", key))[0] for key in ("a", "b")]
+        others = [(await cache.lookup(2, "income", "a"))[0]]
+        return hits, stale, others
+
+    hits, stale, others = run(scenario())
+
+    assert [hit.body for hit in hits] == [b"a", b"b"]
+    assert hits[0].to_response(request()).headers["etag"] == '"v1"'
+    assert stale == [None, None]
+    assert others[0].body == b"bob"
+
+
+def test_rows_read_before_a_write_are_never_served_after_it():
+    cache = ResponseCache(LocalBackend(), ttl=60)
+
+    async def scenario():
+        _, generation = await cache.lookup(1, "income", "a")
+        # The write commits and invalidates while the old rows are read...
+        await cache.invalidate(1, "income")
+        # ...and they are stored under the generation read before it.
+        await cache.store(1, "income", "a", generation, response(b"old"))
+        return await cache.lookup(1, "income", "a")
+
+    hit, generation = run(scenario())
+
+    assert hit is None
+    assert generation == b"1"
+
+
+def test_generations_outlive_evicted_entries():
+    backend = LocalBackend(maxsize=1)
+    cache = ResponseCache(backend, ttl=60)
+
+    async def scenario():
+        _, generation = await cache.lookup(1, "income", "a")
+        await cache.invalidate(1, "income")
+        for key in ("b", "c"):
+            await cache.store(1, "income", key, b"1", response(key.encode()))
+        return await cache.lookup(1, "income", "a")
+
+    _, generation = run(scenario())
+
+    assert backend.evictions == 1
+    assert generation == b"1"
+
+
+class BrokenBackend(LocalBackend):
+    async def get_many(self, keys):
+        raise ConnectionError("cache server down")
+
+    async def incr(self, key, ttl):
+        raise ConnectionError("cache server down")
+
+
+def test_an_unreachable_backend_counts_as_a_miss():
+    cache = ResponseCache(BrokenBackend(), ttl=60)
+
+    async def scenario():
+        hit, generation = await cache.lookup(1, "income", "a")
+        # Nothing is stored without a generation.
+        await cache.store(1, "income", "a", generation, response(b"a"))
+        await cache.invalidate(1, "income")
+        return hit, generation
+
+    assert run(scenario()) == (None, None)
+    assert cache.backend.stats()["size"] == 0
+    assert cache.errors == 2
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "backend", LocalBackend())
+    monkeypatch.setattr(response_cache, "ttl", 60)
+    return response_cache
+
+
+def test_list_reads_are_cached_until_the_owner_writes(
+    client, sessions, cache, alice, bob
+):
+    row = {
+        "user_id": 1,
+        "amount": "10.00",
+        "description": "Salary",
+        "income_date": "2026-01-05",
+    }
+    client.post("/income/post_income", json=row, headers=alice)
+
+    first = client.get("/income/get_all_incomes", headers=alice)
+    opened = len(sessions)
+    second = client.get("/income/get_all_incomes", headers=alice)
+    assert len(sessions) == opened
+    assert second.json() == first.json()
+
+    # Another user's write leaves alice's entries alone.
+    client.post("/income/post_income", json=row, headers=bob)
+    opened = len(sessions)
+    client.get("/income/get_all_incomes", headers=alice)
+    assert len(sessions) == opened
+
+    client.post("/income/post_income", json=row, headers=alice)
+    third = client.get("/income/get_all_incomes", headers=alice)
+    assert len(third.json()["results"]) == 2
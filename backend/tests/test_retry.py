@@ -0,0 +1,150 @@
+from asyncio import run
+import pytest
+from mysql.connector.errors import get_mysql_exception
+import db.retry
+import db.session
+from db.db import PoolTimeoutError
+from db.retry import (
+    CONNECTION,
+    DB_RETRY_ATTEMPTS,
+    DEADLOCK,
+    LOCK_WAIT,
+    classify,
+    retry_transaction,
+)
+from db.session import ExecResult, Session
+
+
+def mysql_error(errno: int):
+    return get_mysql_exception(errno, msg=f"error {errno}")
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    async def backoff(attempt):
+        pass
+
+    monkeypatch.setattr(db.retry, "backoff", backoff)
+    monkeypatch.setattr(db.session, "backoff", backoff)
+
+
+@pytest.mark.parametrize(
+    "error, kind",
+    [
+        (mysql_error(2013), CONNECTION),
+        (mysql_error(2006), CONNECTION),
+        (mysql_error(1213), DEADLOCK),
+        (mysql_error(1205), LOCK_WAIT),
+        (mysql_error(1062), None),  # duplicate key
+        (mysql_error(1146), None),  # no such table
+        (PoolTimeoutError(msg="pool exhausted"), None),
+        (ConnectionError("not a MySQL error"), None),
+    ],
+)
+def test_classify(error, kind):
+    assert classify(error) == kind
+
+
+class FakeSession(Session):
+    """Raises ``errors`` from its statements, in order, then succeeds."""
+
+    def __init__(self, *errors):
+        super().__init__(None, None)
+        self.errors = list(errors)
+        self.recovered = []
+
+    async def _run(self, sql, params, fetch):
+        if self.errors:
+            raise self.errors.pop(0)
+        return ExecResult(1, None)
+
+    async def stream(self, sql, params=(), batch_size=1000):
+        yield []
+
+    async def _commit(self):
+        pass
+
+    async def _rollback(self):
+        pass
+
+    async def _reconnect(self):
+        pass
+
+    async def recover(self, kind: str):
+        self.recovered.append(kind)
+        await super().recover(kind)
+
+
+def handler():
+    """A route handler that writes and commits; also returns its calls."""
+    calls = []
+
+    @retry_transaction
+    async def write(db):
+        calls.append(len(calls))
+        await db.execute("UPDATE t SET a = 1")
+        await db.commit()
+        return "done"
+
+    return write, calls
+
+
+def test_transactions_are_rerun_after_a_transient_error():
+    session = FakeSession(mysql_error(1213))
+    write, calls = handler()
+
+    assert run(write(db=session)) == "done"
+    assert calls == [0, 1]
+    assert session.recovered == [DEADLOCK]
+
+
+def test_permanent_errors_are_not_retried():
+    session = FakeSession(mysql_error(1062))
+    write, calls = handler()
+
+    with pytest.raises(Exception) as raised:
+        run(write(db=session))
+
+    assert raised.value.errno == 1062
+    assert calls == [0]
+
+
+def test_a_commit_with_unknown_outcome_is_not_retried():
+    # The connection dropped during the commit: it may have applied.
+    session = FakeSession()
+    write, calls = handler()
+
+    async def lost_commit():
+        raise mysql_error(2013)
+
+    session._commit = lost_commit
+
+    with pytest.raises(Exception) as raised:
+        run(write(db=session))
+
+    assert classify(raised.value) == CONNECTION
+    assert calls == [0]
+    assert session.recovered == []
+
+
+def test_retries_stop_after_the_configured_attempts():
+    session = FakeSession(*[mysql_error(1205)] * DB_RETRY_ATTEMPTS)
+    write, calls = handler()
+
+    with pytest.raises(Exception) as raised:
+        run(write(db=session))
+
+    assert classify(raised.value) == LOCK_WAIT
+    assert len(calls) == DB_RETRY_ATTEMPTS
+
+
+def test_only_a_transactions_first_read_is_retried_in_place():
+    session = FakeSession(mysql_error(2013))
+    assert run(session.fetchone("SELECT 1")).rowcount == 1
+    assert session.recovered == [CONNECTION]
+
+    # Later in the transaction, the whole handler has to run again.
+    session.errors = [mysql_error(2013)]
+    with pytest.raises(Exception):
+        run(session.fetchone("SELECT 1"))
+    assert session.recovered == [CONNECTION]
@@ -0,0 +1,104 @@
+from asyncio import run
+import pytest
+import db.session
+from db import db as sync_db
+from db.shards import ANCHOR_SQL, ShardMap, home_shard
+from db.session import shard_map
+
+
+def test_home_shards_are_fixed_by_the_user_id():
+    # Other processes, and later releases, must place users the same way.
+    placements = [home_shard(user_id, 4) for user_id in range(1, 9)]
+    assert placements == [3, 1, 3, 0, 2, 0, 2, 3]
+    assert {home_shard(user_id, 4) for user_id in range(100)} == {0, 1, 2, 3}
+
+
+class Directory:
+    """user_shards rows by user id, counting the lookups."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.loads = 0
+
+    async def load(self, user_id):
+        self.loads += 1
+        return self.rows.get(user_id)
+
+
+def test_placements_come_from_the_directory_and_are_cached(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("db.shards.monotonic", lambda: now[0])
+    directory = Directory({1: (0, 1)})
+    shards = ShardMap(4, ttl=5, load=directory.load)
+
+    assert tuple(run(shards.placement(1))) == (0, True)
+    assert tuple(run(shards.placement(2))) == (home_shard(2, 4), False)
+    run(shards.placement(1))
+    assert directory.loads == 2
+
+    directory.rows[1] = (3, 0)
+    now[0] += 5.5
+    assert tuple(run(shards.placement(1))) == (3, False)
+
+    directory.rows[1] = (2, 0)
+    shards.forget(1)
+    assert run(shards.placement(1)).shard == 2
+    assert directory.loads == 4
+
+
+@pytest.fixture
+def directory(monkeypatch):
+    directory = Directory({})
+    monkeypatch.setattr(sync_db, "shard_urls", ["shard-0", "shard-1"])
+    monkeypatch.setattr(db.session, "_anchored", set())
+    monkeypatch.setattr(
+        db.session, "shard_map", ShardMap(2, shard_map.ttl, directory.load)
+    )
+    return directory
+
+
+def income(**fields):
+    return {
+        "user_id": 1,
+        "amount": "10.00",
+        "description": "Salary",
+        "income_date": "2026-01-05",
+        **fields,
+    }
+
+
+def test_users_rows_are_read_and_written_on_their_shard(
+    client, sessions, directory, alice
+):
+    directory.rows[1] = (0, 0)
+
+    opened = len(sessions)
+    client.post("/income/post_income", json=income(), headers=alice)
+    client.post("/income/post_income", json=income(), headers=alice)
+    client.get("/income/get_all_incomes", headers=alice)
+
+    targets = [
+        (session.target, session.queries[0] == ANCHOR_SQL)
+        for session in sessions[opened:]
+    ]
+    # The user is looked up in the directory, on the primary; their anchor
+    # row goes in once, before their first write on the shard.
+    assert targets == [
+        ({}, False),
+        ({"shard": 0}, True),
+        ({"shard": 0, "frozen": False}, False),
+        ({"shard": 0, "frozen": False}, False),
+        ({"shard": 0}, False),
+    ]
+
+
+def test_writes_wait_while_the_user_is_moving(
+    client, sessions, database, directory, alice
+):
+    directory.rows[1] = (1, 1)
+
+    response = client.post("/income/post_income", json=income(), headers=alice)
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert database.execute("SELECT COUNT(*) FROM income").fetchone() == (0,)
@@ -0,0 +1,75 @@
+from asyncio import run
+from struct import pack, unpack
+from pymysql.constants import COMMAND
+from db import aio, session, statements
+from db.statements import StatementCache, statement_cache
+
+
+def test_prepares_on_threshold_use():
+    cache = StatementCache(1, maxsize=2, threshold=2)
+    assert not cache.should_prepare("SELECT 1")
+    assert cache.should_prepare("SELECT 1")
+    assert not cache.should_prepare("SELECT 2")
+
+
+def test_evicts_least_recently_used():
+    cache = StatementCache(1, maxsize=2)
+    assert cache.add("a", 1) == []
+    assert cache.add("b", 2) == []
+    assert cache.get("a") == 1
+    assert cache.add("c", 3) == [2]
+    assert cache.get("b") is None
+    assert list(cache.statements) == ["a", "c"]
+
+
+def test_reconnected_connection_gets_a_new_cache():
+    conn = FakeConnection()
+    cache = statement_cache(conn, 1)
+    cache.add("a", 1)
+    assert statement_cache(conn, 1) is cache
+    assert statement_cache(conn, 2).get("a") is None
+
+
+class Packet:
+    def __init__(self, data):
+        self.data = data
+
+    def get_all_data(self):
+        return self.data
+
+
+class FakeConnection:
+    """Answers COM_STMT_PREPARE for statements with no parameters or columns."""
+
+    def __init__(self):
+        self.commands = []
+        self.next_id = 0
+
+    def thread_id(self):
+        return 1
+
+    async def _execute_command(self, command, data):
+        self.commands.append((command, data))
+
+    async def _read_packet(self):
+        self.next_id += 1
+        return Packet(b"\x00" + pack("<IHH", self.next_id, 0, 0) + b"\x00\x00\x00")
+
+
+def test_evicted_statements_are_closed(monkeypatch):
+    monkeypatch.setattr(statements, "DB_STATEMENT_CACHE_SIZE", 2)
+    monkeypatch.setattr(statements, "DB_PREPARE_THRESHOLD", 1)
+    monkeypatch.setattr(session, "aio", aio, raising=False)
+    conn = FakeConnection()
+    db = session.AsyncSession(None, conn)
+
+    async def prepare_all():
+        return [await db._statement(sql) for sql in ("a", "b", "a", "c")]
+
+    a, b, again, c = run(prepare_all())
+    assert again == a
+    assert c.statement_id == 3
+    closes = [
+        data for command, data in conn.commands if command == COMMAND.COM_STMT_CLOSE
+    ]
+    assert [unpack("<I", data)[0] for data in closes] == [b.statement_id]
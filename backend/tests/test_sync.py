@@ -0,0 +1,128 @@
+from datetime import datetime
+from utils.pagination import pack_cursor, unpack_cursor
+
+
+def income(**fields):
+    return {
+        "user_id": 1,
+        "amount": "10.00",
+        "description": "Salary",
+        "income_date": "2026-01-05",
+        **fields,
+    }
+
+
+def expense(**fields):
+    return {
+        "user_id": 1,
+        "amount": "4.00",
+        "description": "Coffee",
+        "expense_date": "2026-01-06",
+        **fields,
+    }
+
+
+def sync_all(client, headers, token=None, limit=2):
+    """Follow has_more to the end; return the pages and the final token."""
+    pages = []
+    while True:
+        params = {"limit": limit, **({"since": token} if token else {})}
+        body = client.get("/sync", params=params, headers=headers).json()
+        pages.append(body)
+        token = body["next_token"]
+        if not body["has_more"]:
+            return pages, token
+
+
+def changes(pages, table, key="upserts"):
+    id_column = {"income": "income_id", "expenses": "expense_id"}[table]
+    return [
+        row if key == "deletes" else row[id_column]
+        for page in pages
+        for row in page["results"][table][key]
+    ]
+
+
+def stored(database, income_id):
+    return database.execute(
+        "SELECT updated_at, change_seq FROM income WHERE income_id = ?", (income_id,)
+    ).fetchone()
+
+
+def test_writes_record_the_change_number_in_the_same_statement(
+    client, database, sessions, alice
+):
+    client.post("/income/post_incomes", json=[income(), income()], headers=alice)
+    created = client.post("/income/post_income", json=income(), headers=alice)
+    updated = client.put(
+        "/income/put_income", json={"income_id": 1, "amount": "11.00"}, headers=alice
+    )
+    client.delete("/income/delete_income/2", headers=alice)
+
+    assert [stored(database, 1)[1], stored(database, 3)[1]] == [3, 2]
+    assert database.execute(
+        "SELECT row_id, change_seq FROM deleted_rows WHERE resource = 'income'"
+    ).fetchall() == [(2, 4)]
+    for response, income_id in ((created, 3), (updated, 1)):
+        body = response.json()["results"]
+        assert (
+            datetime.fromisoformat(body["updated_at"]) == stored(database, income_id)[0]
+        )
+    writes = [
+        sql
+        for session in sessions
+        for sql in session.queries
+        if sql.lstrip().startswith("UPDATE income")
+    ]
+    assert len(writes) == 1
+
+
+def test_sync_pages_through_every_change_then_only_newer_ones(client, alice, bob):
+    client.post("/income/post_incomes", json=[income(), income()], headers=alice)
+    client.post("/expense/post_expense", json=expense(), headers=alice)
+    client.post("/income/post_income", json=income(), headers=alice)
+    client.delete("/income/delete_income/2", headers=alice)
+    client.post("/expense/post_expense", json=expense(), headers=bob)
+
+    pages, token = sync_all(client, alice)
+
+    assert [page["reset"] for page in pages] == [True, False]
+    assert changes(pages, "income") == [1, 3]
+    assert changes(pages, "expenses") == [1]
+    # Deleted before the full sync: there is nothing to delete locally.
+    assert changes(pages, "income", "deletes") == []
+
+    client.put(
+        "/income/put_income", json={"income_id": 3, "amount": "1.00"}, headers=alice
+    )
+    client.delete("/expense/delete_expense/1", headers=alice)
+    client.post("/expense/post_expense", json=expense(), headers=alice)
+
+    pages, token = sync_all(client, alice, token, limit=1)
+
+    assert [page["reset"] for page in pages] == [False] * 3
+    assert [page["has_more"] for page in pages] == [True, True, False]
+    assert changes(pages, "income") == [3]
+    assert changes(pages, "expenses", "deletes") == [1]
+    assert changes(pages, "expenses") == [3]
+
+    pages, _ = sync_all(client, alice, token)
+    assert changes(pages, "income") + changes(pages, "expenses") == []
+    assert not pages[0]["reset"]
+
+
+def test_tokens_past_the_tombstone_retention_get_a_full_sync(client, alice):
+    client.post("/income/post_income", json=income(), headers=alice)
+    _, token = sync_all(client, alice)
+    *position, floor, _ = unpack_cursor(token, int, int, int, int, str)
+    expired = pack_cursor([*position, floor, datetime(2000, 1, 1).isoformat()])
+
+    pages, _ = sync_all(client, alice, expired)
+
+    assert pages[0]["reset"]
+    assert changes(pages, "income") == [1]
+
+
+def test_malformed_tokens_are_rejected(client, alice):
+    response = client.get("/sync", params={"since": "nope"}, headers=alice)
+    assert response.status_code == 422
@@ -0,0 +1,59 @@
+from csv import writer as csv_writer
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from json import dumps as json_dumps
+from fastapi.responses import StreamingResponse
+from db.session import session_scope
+from schemas import ExportFormat
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def _plain(value):
+    # Decimals are written as strings so exported amounts stay exact.
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _ndjson_batch(column_names, rows) -> bytes:
+    return "".join(
+        json_dumps(dict(zip(column_names, map(_plain, row)))) + "\n" for row in rows
+    ).encode()
+
+
+def _csv_batch(rows) -> bytes:
+    buffer = StringIO()
+    csv_writer(buffer).writerows([[_plain(value) for value in row] for row in rows])
+    return buffer.getvalue().encode()
+
+
+async def _stream(sql, params, column_names, fmt: ExportFormat, target: dict):
+    # The export owns its connection for as long as the body is being sent,
+    # independently of the request's own session.
+    async with session_scope(**target) as db:
+        if fmt == ExportFormat.CSV:
+            yield _csv_batch([column_names])
+
+        async for rows in db.stream(sql, params, EXPORT_BATCH_SIZE):
+            if fmt == ExportFormat.CSV:
+                yield _csv_batch(rows)
+            else:
+                yield _ndjson_batch(column_names, rows)
+
+
+def export_response(
+    sql, params, column_names, fmt: ExportFormat, filename: str, target=None
+):
+    """``target`` holds the `session_scope` arguments, as from `read_target`."""
+    media_type = "text/csv" if fmt == ExportFormat.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        _stream(sql, params, column_names, fmt, target or {}),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{fmt.value}"'
+        },
+    )
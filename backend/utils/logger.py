@@ -9,7 +9,6 @@ class CustomColorFormatter(logging.Formatter):
     def format(self, record):
         # Color definitions
         asctime_color = Fore.BLUE
-        message_color = Fore.WHITE
 
         # Background + Foreground combo for levelname
         level_colors = {
@@ -31,15 +30,13 @@ class CustomColorFormatter(logging.Formatter):
         levelname_color = level_colors.get(record.levelno, Fore.WHITE)
         msg_color = msg_colors.get(record.levelno, Fore.WHITE)
 
-        # Format raw message first
-        original = super().format(record)
+        # Manually color fields, leaving the record untouched: other handlers
+        # (pytest's log capture, for one) format the same record afterwards.
+        asctime = f"{asctime_color}{self.formatTime(record)}{Style.RESET_ALL}"
+        levelname = f"{levelname_color}{record.levelname}{Style.RESET_ALL}"
+        message = f"{msg_color}{record.getMessage()}{Style.RESET_ALL}"
 
-        # Manually color fields
-        record.asctime = f"{asctime_color}{record.asctime}{Style.RESET_ALL}"
-        record.levelname = f"{levelname_color}{record.levelname}{Style.RESET_ALL}"
-        record.msg = f"{msg_color}{record.getMessage()}{Style.RESET_ALL}"
-
-        return f"{record.asctime} - {record.levelname} - {record.msg}"
+        return f"{asctime} - {levelname} - {message}"
 
 
 # Set up logger
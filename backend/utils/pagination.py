@@ -0,0 +1,81 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from json import dumps as json_dumps, loads as json_loads
+from typing import Optional
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def pack_cursor(keys: list) -> str:
+    payload = json_dumps(keys, separators=(",", ":"))
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def unpack_cursor(cursor: str, *types) -> list:
+    """Decode a `pack_cursor` cursor whose keys must have the given types."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        keys = json_loads(urlsafe_b64decode(padded.encode()))
+        if (
+            not isinstance(keys, list)
+            or len(keys) != len(types)
+            or not all(isinstance(key, kind) for key, kind in zip(keys, types))
+        ):
+            raise ValueError
+        return keys
+    except (Base64Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursorError(f"Invalid pagination cursor: {cursor}")
+
+
+def encode_cursor(sort_key, row_id: int) -> str:
+    return pack_cursor([str(sort_key), row_id])
+
+
+def decode_cursor(cursor: str):
+    sort_key, row_id = unpack_cursor(cursor, str, int)
+    return sort_key, row_id
+
+
+def keyset_query(
+    table: str,
+    sort_column: str,
+    id_column: str,
+    user_id: int,
+    cursor: Optional[str],
+    limit: int,
+    columns: str = "*",
+    where: str = "",
+    where_params=(),
+):
+    """Build one newest-first page of a user's rows.
+
+    Rows are ordered by ``(sort_column, id_column)`` descending and the cursor
+    is the last key of the previous page, so every page is a bounded range
+    scan on the ``(user_id, sort_column)`` index however deep the client
+    pages. One extra row is fetched to tell whether another page exists.
+    ``where`` is ANDed onto the user predicate, with its own parameters.
+    """
+    sql = f"SELECT {columns} FROM {table} WHERE user_id = %s{where}"
+    params = [user_id, *where_params]
+
+    if cursor:
+        sort_key, row_id = decode_cursor(cursor)
+        sql += f" AND ({sort_column} < %s OR ({sort_column} = %s AND {id_column} < %s))"
+        params += [sort_key, sort_key, row_id]
+
+    sql += f" ORDER BY {sort_column} DESC, {id_column} DESC LIMIT %s"
+    params.append(limit + 1)
+    return sql, tuple(params)
+
+
+def split_page(rows, limit: int, sort_index: int, id_index: int):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[sort_index], last[id_index])
@@ -0,0 +1,321 @@
+from asyncio import Lock as AsyncLock, open_connection, wait_for
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import NamedTuple, Optional
+from urllib.parse import urlparse
+from config import getenv as os_getenv
+from fastapi import Request
+from fastapi.responses import Response
+from utils.logger import logger
+from utils.responses import etag_headers, etag_matches, not_modified_response
+
+# Unset: per-process LRU. redis://[:password@]host[:port][/db]: any server
+# speaking the Redis protocol, shared by every worker.
+RESPONSE_CACHE_URL = os_getenv("RESPONSE_CACHE_URL")
+RESPONSE_CACHE_SIZE = int(os_getenv("RESPONSE_CACHE_SIZE", "4096"))
+# 0 disables response caching altogether, the default without a shared
+# server: a per-process cache only sees the writes its own worker made.
+RESPONSE_CACHE_TTL = int(
+    os_getenv("RESPONSE_CACHE_TTL", "300" if RESPONSE_CACHE_URL else "0")
+)
+RESPONSE_CACHE_TIMEOUT = float(os_getenv("RESPONSE_CACHE_TIMEOUT", "0.05"))
+
+
+class LocalBackend:
+    """Per-process LRU of byte strings with per-entry TTLs.
+
+    Counters live outside the LRU, as a counter that fell back to zero could
+    make stale entries valid again. Each one expires ``ttl`` seconds after
+    its last increment instead: by then every entry stored before that
+    increment has expired too.
+    """
+
+    # Only this process sees what is stored here.
+    shared = False
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        # key -> (value, expiry), least recently incremented first.
+        self._counters = OrderedDict()
+        self._lock = Lock()
+        self.evictions = 0
+
+    async def get_many(self, keys):
+        now = monotonic()
+        values = []
+        with self._lock:
+            self._expire_counters(now)
+            for key in keys:
+                if key in self._counters:
+                    values.append(str(self._counters[key][0]).encode())
+                    continue
+                entry = self._entries.get(key)
+                if entry is None or entry[1] < now:
+                    self._entries.pop(key, None)
+                    values.append(None)
+                    continue
+                self._entries.move_to_end(key)
+                values.append(entry[0])
+        return values
+
+    async def set(self, key, value: bytes, ttl: int):
+        with self._lock:
+            self._entries[key] = (value, monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _expire_counters(self, now):
+        while self._counters:
+            key, (_, expiry) = next(iter(self._counters.items()))
+            if expiry >= now:
+                break
+            del self._counters[key]
+
+    async def incr(self, key, ttl: int) -> int:
+        now = monotonic()
+        with self._lock:
+            self._expire_counters(now)
+            value = self._counters.pop(key, (0, None))[0] + 1
+            self._counters[key] = (value, now + ttl)
+            return value
+
+    async def close(self):
+        pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "local",
+                "size": len(self._entries),
+                "counters": len(self._counters),
+                "maxsize": self.maxsize,
+                "evictions": self.evictions,
+            }
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisBackend:
+    """Minimal client for the Redis protocol (RESP2): GET/MGET, SET EX, INCR.
+
+    One connection per process, reopened on failure. Entries and counters
+    both carry a TTL, a counter's renewed by each increment.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, timeout=0.05):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+        self._lock = AsyncLock()
+
+    async def _connect(self):
+        self._reader, self._writer = await open_connection(self.host, self.port)
+        if self.password:
+            await self._roundtrip("AUTH", self.password)
+        if self.db:
+            await self._roundtrip("SELECT", self.db)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _read_reply(self):
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by cache server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            return (await self._reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    async def _roundtrip(self, *args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._writer.write(b"".join(parts))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def _command(self, *args):
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await wait_for(self._connect(), self.timeout)
+                return await wait_for(self._roundtrip(*args), self.timeout)
+            except RedisError:
+                raise
+            except Exception:
+                # A timed-out or broken connection may hold a partial reply.
+                self._close()
+                raise
+
+    async def get_many(self, keys):
+        return await self._command("MGET", *keys)
+
+    async def set(self, key, value: bytes, ttl: int):
+        await self._command("SET", key, value, "EX", ttl)
+
+    async def incr(self, key, ttl: int) -> int:
+        value = await self._command("INCR", key)
+        await self._command("EXPIRE", key, ttl)
+        return value
+
+    async def close(self):
+        async with self._lock:
+            self._close()
+
+    def stats(self):
+        return {
+            "backend": "redis",
+            "size": None,
+            "counters": None,
+            "maxsize": None,
+            "evictions": None,
+        }
+
+
+class CachedResponse(NamedTuple):
+    etag: Optional[str]
+    body: bytes
+
+    def to_response(self, request: Request) -> Response:
+        if self.etag and etag_matches(request, self.etag):
+            return not_modified_response(self.etag)
+        return Response(
+            content=self.body,
+            media_type="application/json",
+            headers=etag_headers(self.etag) if self.etag else None,
+        )
+
+
+class ResponseCache:
+    """Serialized read responses keyed by (user_id, resource, request).
+
+    Each (user_id, resource) pair has a generation counter that is stored in
+    every entry and bumped by `invalidate` once a write has committed, which
+    makes all of that pair's entries stale at once. A response is stored
+    with the generation read *before* its rows were, so a write that lands
+    in between can never leave a stale entry behind. Backend failures are
+    logged and treated as misses.
+    """
+
+    def __init__(self, backend, ttl=300):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _keys(self, user_id: int, resource: str, request_key: str):
+        scope = f"resp:{user_id}:{resource}"
+        return f"{scope}:gen", f"{scope}:{request_key}"
+
+    async def lookup(self, user_id: int, resource: str, request_key: str):
+        """Return ``(CachedResponse or None, generation)``."""
+        generation_key, entry_key = self._keys(user_id, resource, request_key)
+        try:
+            generation, entry = await self.backend.get_many([generation_key, entry_key])
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Response cache unavailable: {e}")
+            return None, None
+
+        generation = generation or b"0"
+        if entry is not None:
+            entry_generation, etag, body = entry.split(b"\n", 2)
+            if entry_generation == generation:
+                self.hits += 1
+                return CachedResponse(etag.decode() or None, body), generation
+        self.misses += 1
+        return None, generation
+
+    async def store(
+        self,
+        user_id: int,
+        resource: str,
+        request_key: str,
+        generation: Optional[bytes],
+        response: Response,
+    ):
+        if generation is None:
+            return
+        _, entry_key = self._keys(user_id, resource, request_key)
+        etag = response.headers.get("etag", "").encode()
+        try:
+            await self.backend.set(
+                entry_key, b"\n".join([generation, etag, response.body]), self.ttl
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Response cache unavailable: {e}")
+
+    async def invalidate(self, user_id: int, resource: str):
+        generation_key, _ = self._keys(user_id, resource, "")
+        try:
+            await self.backend.incr(generation_key, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.error(
+                f"Failed to invalidate cached {resource} of user {user_id}: {e}"
+            )
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            **self.backend.stats(),
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def request_key(request: Request) -> str:
+    return f"{request.url.path}?{request.url.query}"
+
+
+response_cache = ResponseCache(
+    (
+        RedisBackend(RESPONSE_CACHE_URL, timeout=RESPONSE_CACHE_TIMEOUT)
+        if RESPONSE_CACHE_URL
+        else LocalBackend(maxsize=RESPONSE_CACHE_SIZE)
+    ),
+    ttl=RESPONSE_CACHE_TTL,
+)
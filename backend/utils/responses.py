@@ -0,0 +1,78 @@
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from schemas import BaseErrorResponse
+
+
+class ModelResponse(JSONResponse):
+    """JSON response that renders a Pydantic model straight to bytes.
+
+    The model is serialized once by pydantic-core, instead of being dumped to
+    a dict, walked again by ``jsonable_encoder`` and finally by ``json.dumps``.
+    Plain dicts and lists are still rendered the regular way.
+    """
+
+    def render(self, content) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return super().render(content)
+
+
+def error_response(e: Exception):
+    return ModelResponse(
+        status_code=500,
+        content=BaseErrorResponse(
+            success=False, errorType=type(e).__name__, error=str(e)
+        ),
+    )
+
+
+def auth_error_response():
+    return ModelResponse(
+        status_code=401,
+        content=BaseErrorResponse(
+            success=False, errorType="AuthRequired", error="User is not authenticated."
+        ),
+    )
+
+
+def validation_error_response(msg: str):
+    return ModelResponse(
+        status_code=422,
+        content=BaseErrorResponse(
+            success=False, errorType="ValidationError", error=msg
+        ),
+    )
+
+
+def not_found_response(msg: str):
+    return ModelResponse(
+        status_code=404,
+        content=BaseErrorResponse(success=False, errorType="NotFoundError", error=msg),
+    )
+
+
+def unavailable_response(msg: str, retry_after: int):
+    return ModelResponse(
+        status_code=503,
+        headers={"Retry-After": str(retry_after)},
+        content=BaseErrorResponse(success=False, errorType="Unavailable", error=msg),
+    )
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    # Weak comparison, as RFC 9110 requires for If-None-Match.
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def etag_headers(etag: str) -> dict:
+    # no-cache lets the browser keep the body but revalidate it every time.
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified_response(etag: str):
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Optional
+from config import getenv as os_getenv
+from schemas import User
+
+USER_CACHE_SIZE = int(os_getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL = float(os_getenv("USER_CACHE_TTL", "60"))
+
+
+class UserCache:
+    """Per-process LRU cache of authenticated users, keyed by username.
+
+    Entries expire after ``ttl`` seconds so changes made by other workers are
+    picked up eventually; changes made by this process are invalidated
+    explicitly by the routes that write to ``users``.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._usernames = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, username: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[1] < monotonic():
+                if entry is not None:
+                    self._drop(username)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(username)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, user: User):
+        with self._lock:
+            self._drop(self._usernames.get(user.user_id))
+            self._drop(user.username)
+            self._entries[user.username] = (user, monotonic() + self.ttl)
+            self._usernames[user.user_id] = user.username
+
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, user_id: Optional[int] = None, username: Optional[str] = None):
+        with self._lock:
+            if user_id is not None:
+                self._drop(self._usernames.get(user_id))
+            if username is not None:
+                self._drop(username)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._usernames.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _drop(self, username: Optional[str]):
+        entry = self._entries.pop(username, None)
+        if entry is not None:
+            self._usernames.pop(entry[0].user_id, None)
+
+
+user_cache = UserCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
@@ -0,0 +1,20 @@
+// The get_all_* endpoints are paginated with an opaque `next_cursor`; walk
+// every page and hand each one to `onPage` as soon as it arrives.
+export async function fetchAllPages<T>(
+  url: string,
+  auth: string,
+  onPage: (rows: T[]) => void
+) {
+  let cursor: string | null = null;
+  do {
+    const pageUrl: string = cursor
+      ? `${url}?cursor=${encodeURIComponent(cursor)}`
+      : url;
+    const res = await fetch(pageUrl, {
+      headers: { Authorization: "Bearer " + auth },
+    }).then((res) => res.json());
+    if (!res.success) return;
+    onPage(res.results);
+    cursor = res.next_cursor;
+  } while (cursor);
+}
@@ -2,6 +2,7 @@ import DataTable from "react-data-table-component";
 import type { TableColumn } from "react-data-table-component";
 import { useEffect, useMemo, useState } from "react";
 import { useAuth } from "../context/AuthCon";
+import { fetchAllPages } from "../fetchAllPages";
 import {
   Formik,
   Form as FormikForm,
@@ -365,14 +366,10 @@ export default function Budget() {
 
   useEffect(() => {
     if (!auth) return;
-    fetch(`${BASE_URL}/budget/get_all_budgets`, {
-      headers: {
-        Authorization: "Bearer " + auth,
-      },
-    })
-      .then((res) => res.json())
-      .then((res) => setBudgets(res.results))
-      .catch(console.error);
+    setBudgets([]);
+    fetchAllPages<Budget>(`${BASE_URL}/budget/get_all_budgets`, auth, (page) =>
+      setBudgets((prev) => [...prev, ...page])
+    ).catch(console.error);
   }, [auth]);
 
   return auth ? (
@@ -2,6 +2,7 @@ import DataTable from "react-data-table-component";
 import type { TableColumn } from "react-data-table-component";
 import { useEffect, useMemo, useState } from "react";
 import { useAuth } from "../context/AuthCon";
+import { fetchAllPages } from "../fetchAllPages";
 import {
   Formik,
   Form as FormikForm,
@@ -388,13 +389,10 @@ export default function Expense() {
     const myHeaders = new Headers();
     myHeaders.append("Authorization", "Bearer " + auth);
 
-    fetch(`${BASE_URL}/expense/get_all_expenses`, {
-      method: "GET",
-      headers: myHeaders,
-    })
-      .then((res) => res.json())
-      .then((res) => setExpenses(res.results))
-      .catch(console.error);
+    setExpenses([]);
+    fetchAllPages<Expense>(`${BASE_URL}/expense/get_all_expenses`, auth, (page) =>
+      setExpenses((prev) => [...prev, ...page])
+    ).catch(console.error);
   }, [auth]);
 
   return auth ? (
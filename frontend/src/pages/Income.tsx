@@ -3,6 +3,7 @@ import type { TableColumn } from "react-data-table-component";
 import type { Income } from "../schemas";
 import { useEffect, useMemo, useState } from "react";
 import { useAuth } from "../context/AuthCon";
+import { fetchAllPages } from "../fetchAllPages";
 
 const BASE_URL = process.env.BASE_URL;
 
@@ -330,12 +331,10 @@ export default function Income() {
 
   useEffect(() => {
     if (!auth) return;
-    fetch(`${BASE_URL}/income/get_all_incomes`, {
-      headers: { Authorization: "Bearer " + auth },
-    })
-      .then((res) => res.json())
-      .then((res) => setIncomes(res.results))
-      .catch(console.error);
+    setIncomes([]);
+    fetchAllPages<Income>(`${BASE_URL}/income/get_all_incomes`, auth, (page) =>
+      setIncomes((prev) => [...prev, ...page])
+    ).catch(console.error);
   }, [auth]);
 
   function deleteIncome(income: Income) {
@@ -2,6 +2,7 @@ import DataTable from "react-data-table-component";
 import type { TableColumn } from "react-data-table-component";
 import { useEffect, useMemo, useState } from "react";
 import { useAuth } from "../context/AuthCon";
+import { fetchAllPages } from "../fetchAllPages";
 import {
   Formik,
   Form as FormikForm,
@@ -406,14 +407,10 @@ export default function SavingsGoals() {
 
   useEffect(() => {
     if (!auth) return;
-    fetch(`${BASE_URL}/savings_goals/get_all_goals`, {
-      headers: {
-        Authorization: "Bearer " + auth,
-      },
-    })
-      .then((res) => res.json())
-      .then((res) => setGoals(res.results))
-      .catch(console.error);
+    setGoals([]);
+    fetchAllPages<SavingsGoal>(`${BASE_URL}/savings_goals/get_all_goals`, auth, (page) =>
+      setGoals((prev) => [...prev, ...page])
+    ).catch(console.error);
   }, [auth]);
 
   return auth ? (
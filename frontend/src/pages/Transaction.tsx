@@ -2,6 +2,7 @@ import DataTable from "react-data-table-component";
 import type { TableColumn } from "react-data-table-component";
 import { useEffect, useMemo, useState } from "react";
 import { useAuth } from "../context/AuthCon";
+import { fetchAllPages } from "../fetchAllPages";
 import {
   Formik,
   Form as FormikForm,
@@ -400,14 +401,10 @@ export default function Transaction() {
 
   useEffect(() => {
     if (!auth) return;
-    fetch(`${BASE_URL}/transaction/get_all_transactions`, {
-      headers: {
-        Authorization: "Bearer " + auth,
-      },
-    })
-      .then((res) => res.json())
-      .then((res) => setTransactions(res.results))
-      .catch(console.error);
+    setTransactions([]);
+    fetchAllPages<Transaction>(`${BASE_URL}/transaction/get_all_transactions`, auth, (page) =>
+      setTransactions((prev) => [...prev, ...page])
+    ).catch(console.error);
   }, [auth]);
 
   return auth ? (
@@ -41,6 +41,7 @@ export const BaseIncomeModelSchema = yup.object({
     description: yup.string().notRequired(),
     income_date: yup.date().notRequired(),
     created_at: yup.date().notRequired(),
+    updated_at: yup.date().notRequired(),
 });
 
 export const IncomeSchema = BaseIncomeModelSchema.shape({
@@ -50,6 +51,7 @@ export const IncomeSchema = BaseIncomeModelSchema.shape({
     description: yup.string().required(),
     income_date: yup.date().required(),
     created_at: yup.date().required(),
+    updated_at: yup.date().required(),
 });
 
 export const CreateIncomeSchema = yup.object({
@@ -80,6 +82,7 @@ export const BaseExpenseModelSchema = yup.object({
     description: yup.string().notRequired(),
     expense_date: yup.date().notRequired(),
     created_at: yup.date().notRequired(),
+    updated_at: yup.date().notRequired(),
 });
 
 export const ExpenseSchema = BaseExpenseModelSchema.shape({
@@ -88,6 +91,7 @@ export const ExpenseSchema = BaseExpenseModelSchema.shape({
     amount: yup.number().required(),
     expense_date: yup.date().required(),
     created_at: yup.date().required(),
+    updated_at: yup.date().required(),
 });
 
 export const CreateExpenseSchema = yup.object({
@@ -121,6 +125,7 @@ export const BaseTransactionModelSchema = yup.object({
     transaction_date: yup.date().notRequired(),
     type: TransactionTypeEnum.notRequired(),
     created_at: yup.date().notRequired(),
+    updated_at: yup.date().notRequired(),
 });
 
 export const TransactionSchema = BaseTransactionModelSchema.shape({
@@ -130,6 +135,7 @@ export const TransactionSchema = BaseTransactionModelSchema.shape({
     transaction_date: yup.date().required(),
     type: TransactionTypeEnum.required(),
     created_at: yup.date().required(),
+    updated_at: yup.date().required(),
 });
 
 export const CreateTransactionSchema = yup.object({
@@ -162,6 +168,7 @@ export const BaseBudgetModelSchema = yup.object({
     start_date: yup.date().notRequired(),
     end_date: yup.date().notRequired(),
     created_at: yup.date().notRequired(),
+    updated_at: yup.date().notRequired(),
 });
 
 export const BudgetSchema = BaseBudgetModelSchema.shape({
@@ -171,6 +178,7 @@ export const BudgetSchema = BaseBudgetModelSchema.shape({
     start_date: yup.date().required(),
     end_date: yup.date().required(),
     created_at: yup.date().required(),
+    updated_at: yup.date().required(),
 });
 
 export const CreateBudgetSchema = yup.object({